@@ -3,17 +3,34 @@ import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-from realsim.jobs import Job, EmptyJob
+from realsim.cluster.events import EventQueue, Delta, ARRIVAL, START, CHANGE, FINISH
+from realsim.cluster.nodes import NodeMap
+from realsim.cluster.snapshot import save_snapshot
+from realsim.cluster.transaction import Transaction
+from realsim.cluster.watchdog import Watchdog
+from realsim.cluster.xunits import XunitIndex
+from realsim.jobs import Job, ExecutionUnit, WaitingQueue
 from realsim.jobs.utils import deepcopy_list
 from realsim.scheduler.scheduler import Scheduler
 from realsim.logger.logger import Logger
 
+from numpy import array, ceil
 import math
+from typing import Callable, Iterator, Optional
+
+
+# Relative distance from the earliest completion inside which the executing
+# jobs complete at the same event. The remaining time of a job is the distance
+# of its finish time from the clock, which differs from the remaining time it
+# would have if it was advanced at every step only by floating point round-off
+# (a few units in the last place of the clock); completions closer than that
+# are one event.
+COMPLETION_TOLERANCE = 1e-9
 
 
 class AbstractCluster(abc.ABC):
 
-    def __init__(self, nodes, cores_per_node):
+    def __init__(self, nodes, cores_per_node, tick: Optional[float] = None):
 
         # Number of nodes
         self.nodes = nodes
@@ -23,6 +40,8 @@ class AbstractCluster(abc.ABC):
         self.total_cores = self.nodes * self.cores_per_node
         # Number of current free cores
         self.free_cores = self.total_cores
+        # Free cores of every node
+        self.node_map = NodeMap(self.nodes, self.cores_per_node)
 
         # Scheduler instance for the cluster
         self.scheduler: Scheduler
@@ -30,14 +49,39 @@ class AbstractCluster(abc.ABC):
         # Logger instance for the cluster
         self.logger: Logger
 
-        # Loaded jobs to pre-waiting queue based on their queued time
+        # Loaded jobs to pre-waiting queue sorted by their queued time
         self.preloaded_queue: list[Job] = list()
+        # Read cursor of the preloaded queue; the jobs before the cursor have
+        # already been moved to the waiting queue
+        self.preloaded_cursor: int = 0
         # The generated jobs are first deployed here
-        self.waiting_queue: list[Job] = list()
+        self.waiting_queue: WaitingQueue = WaitingQueue()
         # The queue of jobs that are executing
-        self.execution_list: list[list[Job]] = list()
+        self.execution_list: list[ExecutionUnit] = list()
+        # Job id --> execution unit of every executing job
+        self.xunit_of: dict[int, ExecutionUnit] = dict()
         # Finished jobs' ids list
         self.finished_jobs: list[int] = list()
+        # Execution units whose jobs all finished during the last next_state;
+        # their resources are returned by free_resources
+        self.finished_xunits: list[ExecutionUnit] = list()
+        # Non-filled execution units sorted by their free cores
+        self.nonfilled_index = XunitIndex()
+        # Time base of the simulation; if set, every point in time is a whole
+        # number of ticks (e.g. 1e-6 for microseconds) and the completion
+        # events are ordered by integer ticks
+        self.tick: Optional[float] = tick
+        # Completion times of the executing jobs
+        self.completions = EventQueue()
+        # State deltas of the current step; only recorded while the simulation
+        # is consumed through `events`
+        self.deltas: Optional[list[Delta]] = None
+        # Increased every time jobs finish inside the execution list
+        self.xunits_version: int = 0
+        # Scheduling signature of the scheduler at the last deployment that
+        # failed; while the signature stays the same the scheduler is not
+        # called again
+        self.failed_signature: Optional[tuple] = None
 
         # Jobs' management
 
@@ -56,96 +100,339 @@ class AbstractCluster(abc.ABC):
         # of a cluster
         self.makespan: float = 0
 
+        # Number of times the cluster moved to its next state
+        self.num_of_events: int = 0
+
+        # Snapshots of the simulation are saved at `snapshot_path` every
+        # `snapshot_interval` events; disabled if no path is set
+        self.snapshot_path: Optional[str] = None
+        self.snapshot_interval: int = 0
+
+        # Called with the cluster after every step; e.g. a StateTracer that
+        # records the digests of the states of the simulation
+        self.tracer: Optional[Callable[['AbstractCluster'], None]] = None
+
+        # Limits of a run; the number of steps that repeat a state without
+        # advancing in time, the seconds of real time and the number of events
+        self.stall_steps: int = 1000
+        self.wall_time_budget: Optional[float] = None
+        self.events_budget: Optional[int] = None
+
     def assign_scheduler(self, scheduler: Scheduler):
         self.scheduler = scheduler
         self.scheduler.assign_cluster(self)
+        # A different scheduler may succeed where the last one failed
+        self.failed_signature = None
 
     def assign_logger(self, logger: Logger):
         self.logger = logger
         self.logger.assign_cluster(self)
 
+    def set_snapshots(self, path: Optional[str], interval: int = 1000) -> None:
+        """Save a snapshot of the simulation to `path` every `interval` events.
+        Set `path` to None to stop saving snapshots.
+        """
+        if path is not None and interval <= 0:
+            raise RuntimeError(f"Snapshot interval should be positive: {interval}")
+        self.snapshot_path = path
+        self.snapshot_interval = interval
+
+    def set_tracer(self, tracer: Optional[Callable[['AbstractCluster'], None]]) -> None:
+        """Call `tracer` with the cluster after every step. Set `tracer` to
+        None to stop tracing.
+        """
+        self.tracer = tracer
+
+    def snap(self, time: float) -> float:
+        """Round a point in time to the time base of the cluster
+        """
+        if self.tick is None or time == math.inf:
+            return time
+        return round(time / self.tick) * self.tick
+
+    def advance(self, elapsed: float) -> None:
+        """Move the clock of the cluster forward by `elapsed`
+        """
+        self.makespan = self.snap(self.makespan + elapsed)
+
+    def event_key(self, time: float):
+        """Return the key of a point in time inside the events queue; the
+        number of ticks if the cluster has a tick time base
+        """
+        if self.tick is None or time == math.inf:
+            return time
+        return round(time / self.tick)
+
+    def event_time(self, key) -> float:
+        """Return the point in time of an event key
+        """
+        if self.tick is None or key == math.inf:
+            return key
+        return key * self.tick
+
+    def set_budgets(self,
+                    wall_time: Optional[float] = None,
+                    max_events: Optional[int] = None,
+                    stall_steps: int = 1000) -> None:
+        """Abort a run that takes more than `wall_time` seconds, that reaches
+        more than `max_events` events or that repeats the same state for
+        `stall_steps` steps without advancing in time
+        """
+        if stall_steps <= 0:
+            raise RuntimeError(f"Stall steps should be positive: {stall_steps}")
+        self.wall_time_budget = wall_time
+        self.events_budget = max_events
+        self.stall_steps = stall_steps
+
+    def watchdog(self) -> Watchdog:
+        return Watchdog(self,
+                        stall_steps=self.stall_steps,
+                        wall_time=self.wall_time_budget,
+                        max_events=self.events_budget)
+
     def half_node_cores(self, job: Job) -> int:
         return job.half_node_cores
 
     def full_node_cores(self, job: Job) -> int:
         return job.full_node_cores
 
+    def allocate(self, unit: ExecutionUnit) -> None:
+        """Bind the first free nodes that fit the execution unit to it
+        """
+        num_of_nodes = math.ceil(unit.occupied_cores() / self.cores_per_node)
+
+        nodes = self.node_map.first_fit(num_of_nodes)
+        if nodes is None:
+            raise RuntimeError(f"Not enough free nodes for {unit}")
+
+        self.node_map.allocate(nodes)
+        unit.nodes = nodes
+        self.free_cores -= unit.occupied_cores()
+
+    def release(self, unit: ExecutionUnit) -> None:
+        """Return the nodes of the execution unit to the cluster
+        """
+        self.node_map.release(unit.nodes)
+        unit.nodes = None
+        self.free_cores += unit.occupied_cores()
+
+    def shrink(self, unit: ExecutionUnit, binded_cores: int) -> None:
+        """Reduce the binded cores of a co-located execution unit to
+        `binded_cores` and return the nodes it no longer needs
+        """
+        self.free_cores += unit.occupied_cores()
+        unit.binded_cores = binded_cores
+        self.free_cores -= unit.occupied_cores()
+
+        num_of_nodes = math.ceil(unit.occupied_cores() / self.cores_per_node)
+        self.node_map.release(unit.nodes[num_of_nodes:])
+        unit.nodes = unit.nodes[:num_of_nodes]
+
+    def transaction(self) -> Transaction:
+        """Start a transaction; the deployments made through it can be rolled
+        back
+        """
+        return Transaction(self)
+
     def preload_jobs(self, jobs_set: list[Job]) -> None:
         # Get a clean deep copy of the set of jobs
         copy = deepcopy_list(jobs_set)
 
+        # Arrivals happen on the time base of the cluster
+        if self.tick is not None:
+            for job in copy:
+                job.queued_time = self.snap(job.queued_time)
+
         # Sort jobs by their time they appear on the waiting queue
         copy.sort(key=lambda job: job.queued_time)
 
         if self.makespan == 0:
             self.id_counter = 0
 
-        # Preload jobs and calculate their respective half and full node cores
-        # usage
-        for job in copy:
+        # Calculate the half and full node cores usage of all the jobs at once
+        half_node = self.cores_per_node / 2
+        num_of_processes = array([job.num_of_processes for job in copy])
+        half_node_cores = (ceil(num_of_processes / half_node) * half_node).astype(int)
+        full_node_cores = (ceil(num_of_processes / self.cores_per_node) * self.cores_per_node).astype(int)
+
+        for i, job in enumerate(copy):
             job.job_id = self.id_counter
-            job.half_node_cores = int(math.ceil(job.num_of_processes / (self.cores_per_node / 2)) * (self.cores_per_node / 2))
-            job.full_node_cores = int(math.ceil(job.num_of_processes / self.cores_per_node) * self.cores_per_node)
+            job.half_node_cores = int(half_node_cores[i])
+            job.full_node_cores = int(full_node_cores[i])
             self.id_counter += 1
-            self.preloaded_queue.append(job)
+
+        # Merge the new jobs with the ones that have not yet arrived
+        pending = self.preloaded_queue[self.preloaded_cursor:]
+        if pending != [] and copy != [] and copy[0].queued_time < pending[-1].queued_time:
+            pending.extend(copy)
+            pending.sort(key=lambda job: job.queued_time)
+            self.preloaded_queue[self.preloaded_cursor:] = pending
+        else:
+            self.preloaded_queue.extend(copy)
+
+    def has_preloaded(self) -> bool:
+        """Return True if there are jobs that have not yet arrived to the
+        waiting queue
+        """
+        return self.preloaded_cursor < len(self.preloaded_queue)
+
+    def next_arrival(self) -> float:
+        """Return the queued time of the next job to arrive or infinity if
+        every job has arrived
+        """
+        if self.preloaded_cursor < len(self.preloaded_queue):
+            return self.preloaded_queue[self.preloaded_cursor].queued_time
+        return math.inf
 
     def load_in_waiting_queue(self) -> None:
 
-        copy = deepcopy_list(self.preloaded_queue)
+        preloaded_queue = self.preloaded_queue
+        cursor = self.preloaded_cursor
 
-        for job in copy:
-            if job.queued_time <= self.makespan:
-                self.waiting_queue.append(job)
-                self.preloaded_queue.remove(job)
+        while cursor < len(preloaded_queue) and preloaded_queue[cursor].queued_time <= self.makespan:
+            job = preloaded_queue[cursor]
+            job.submit(self)
+            self.scheduler.admit(job)
+            self.waiting_queue.append(job)
+            if self.deltas is not None:
+                self.record(ARRIVAL, job)
+            cursor += 1
 
-    def filled_xunits(self) -> list[list[Job]]:
+        self.preloaded_cursor = cursor
+
+    def filled_xunits(self) -> list[ExecutionUnit]:
         """Return all the executing units that have no empty space. All the
         binded cores are completely filled.
         """
+        return [unit for unit in self.execution_list if unit.is_filled()]
 
-        filled_units: list[list[Job]] = list()
+    def nonfilled_xunits(self) -> list[ExecutionUnit]:
+        """Return all the execution units that have empty space. All the
+        binded cores are not filled.
+        """
+        return [unit for unit in self.execution_list if unit.is_nonfilled()]
 
-        for unit in self.execution_list:
+    def fitting_xunits(self, cores: int) -> list[ExecutionUnit]:
+        """Return the non-filled execution units with at least `cores` free
+        cores; the best fitting unit first
+        """
+        return self.nonfilled_index.fitting(cores)
 
-            filled = True
+    def nonfitting_xunits(self, cores: int) -> list[ExecutionUnit]:
+        """Return the non-filled execution units with fewer than `cores` free
+        cores
+        """
+        return self.nonfilled_index.nonfitting(cores)
 
+    def sync_events(self) -> None:
+        """Called after every deployment of the scheduler. Start the virtual
+        clock of the jobs that were deployed and register the completion time
+        of every job that started executing or changed its speedup. Only the
+        execution units whose members changed are visited.
+        """
+        for unit in self.execution_list:
+            if not unit.dirty:
+                continue
+            unit.dirty = False
+            self.nonfilled_index.update(unit)
             for job in unit:
-                if type(job) == EmptyJob:
-                    filled = False
-                    break
+                self.xunit_of[job.job_id] = unit
+                if job.progress_time is None:
+                    job.start(self)
+                    self.reschedule(job)
+                    if self.deltas is not None:
+                        self.record(START, job)
+                elif not self.is_scheduled(job):
+                    self.reschedule(job)
+                    if self.deltas is not None:
+                        self.record(CHANGE, job)
+
+    def is_scheduled(self, job: Job) -> bool:
+        """Check if the completion of an executing job is registered at its
+        current finish time
+        """
+        return self.completions.is_scheduled(job.job_id, self.event_key(job.finish_time))
 
-            if filled:
-                filled_units.append(unit)
+    def reschedule(self, job: Job) -> None:
+        """Register the new completion time of an executing job whose
+        remaining time changed
+        """
+        self.completions.schedule(job.job_id, self.event_key(job.finish_time))
 
-        return filled_units
+    def next_completion(self):
+        """Return the key of the earliest projected completion of an
+        executing job
+        """
+        return self.completions.peek()
 
-    def nonfilled_xunits(self) -> list[list[Job]]:
-        """Return all the execution units that have empty space. All the
-        binded cores are not filled.
+    def pop_completions(self, key) -> list[int]:
+        """Remove and return the ids of the executing jobs whose projected
+        completion is up to and including `key`
         """
+        return self.completions.pop_until(key)
+
+    def next_event(self, arrivals: bool = True) -> tuple[float, set[int]]:
+        """Return the time until the next event of the simulation and the ids
+        of the executing jobs that complete at it; their completions are
+        removed. The next event is the earliest completion of an executing job
+        or, if `arrivals` is set, the earliest time a job shows up in the
+        waiting queue.
+
+        The jobs whose finish times are within COMPLETION_TOLERANCE of the
+        next event complete at it. With a tick time base only the jobs with
+        the same number of ticks complete together.
+        """
+        if self.tick is not None:
+            # The points in time are whole ticks; the jobs that complete at
+            # the next event have the same key
+            next_key = self.next_completion()
+            if arrivals:
+                next_key = min(next_key, self.event_key(self.next_arrival()))
+            finishing = set(self.pop_completions(next_key))
+            return self.event_time(next_key) - self.makespan, finishing
 
-        nonfilled_units: list[list[Job]] = list()
+        time = self.next_completion()
 
-        for execution_unit in self.execution_list:
+        if arrivals:
+            showup_time = self.next_arrival()
+            if showup_time > self.makespan and showup_time < time:
+                time = showup_time
 
-            # We don't care about compact jobs
-            if len(execution_unit) == 1:
-                continue
+        if time == math.inf:
+            return math.inf, set()
 
-            # At least one has to be non empty and at least one empty
-            non_empty = 0
-            empty = 0
-            for job in execution_unit:
-                if type(job) == EmptyJob:
-                    empty += 1
-                    break
-                else:
-                    non_empty += 1
+        limit = time + COMPLETION_TOLERANCE * max(1.0, abs(time))
+        finishing = set(self.pop_completions(limit))
 
-            if non_empty > 0 and empty > 0:
-                nonfilled_units.append(execution_unit)
+        return max(time - self.makespan, 0.0), finishing
+
+    def record(self, kind: str, job: Job) -> None:
+        """Record a state delta of a job for the consumer of `events`
+        """
+        self.deltas.append(Delta(kind, self.makespan, job.job_id,
+                                 job.binded_cores, job.speedup,
+                                 job.finish_time))
+
+    def job_finished(self, job: Job) -> None:
+        """Account for a job that finished executing
+        """
+        self.logger.evt_job_finishes(job)
+        self.finished_jobs.append(job.job_id)
+        if self.deltas is not None:
+            self.record(FINISH, job)
+
+    def finishing_xunits(self, finishing: set[int]) -> list[ExecutionUnit]:
+        """Return the execution units that have at least one job among the
+        finishing jobs
+        """
+        if finishing:
+            self.xunits_version += 1
 
-        return nonfilled_units
+        xunits: dict[int, ExecutionUnit] = dict()
+        for job_id in finishing:
+            unit = self.xunit_of.pop(job_id)
+            xunits[id(unit)] = unit
+        return list(xunits.values())
 
     @abc.abstractmethod
     def next_state(self) -> None:
@@ -155,10 +442,37 @@ class AbstractCluster(abc.ABC):
     def free_resources(self) -> None:
         pass
 
+    def remove_finished_xunits(self) -> None:
+        """Compact the execution list in place by dropping the finished
+        execution units
+        """
+        if self.finished_xunits == []:
+            return
+
+        finished = set(map(id, self.finished_xunits))
+
+        execution_list = self.execution_list
+        pos = 0
+        for unit in execution_list:
+            if id(unit) not in finished:
+                execution_list[pos] = unit
+                pos += 1
+        del execution_list[pos:]
+
+        self.finished_xunits.clear()
+
     def setup(self):
         self.free_cores = self.total_cores
+        self.node_map = NodeMap(self.nodes, self.cores_per_node)
         self.makespan = 0
         self.execution_list = list()
+        self.xunit_of = dict()
+        self.finished_xunits = list()
+        self.nonfilled_index = XunitIndex()
+        self.completions.clear()
+        self.xunits_version = 0
+        self.failed_signature = None
+        self.num_of_events = 0
 
     def step(self):
 
@@ -171,14 +485,27 @@ class AbstractCluster(abc.ABC):
         self.load_in_waiting_queue()
         
         # Check if there are any jobs left waiting
-        if self.waiting_queue != []:
+        if (self.waiting_queue != [] and self.failed_signature is not None
+                and self.scheduler.scheduling_signature() == self.failed_signature):
+
+            # Nothing the scheduler decides on changed since the last
+            # deployment that failed, so it would fail again
+            self.logger.cluster_events["deploying:skipped"] += 1
+
+        elif self.waiting_queue != []:
 
             # Deploy/Submit jobs to the execution list
             deploy_res = self.scheduler.deploy()
 
+            # Let the cluster know about the new state of the execution list
+            self.sync_events()
+
+            if not deploy_res:
+                self.failed_signature = self.scheduler.scheduling_signature()
+
             # If scheduler deployed jobs to execution list successfully and the
             # backfilling policy is enabled
-            if deploy_res and self.scheduler.backfill_enabled:
+            elif self.scheduler.backfill_enabled:
 
                 # Execute the backfilling algorithm
                 backfill_res = self.scheduler.backfill()
@@ -199,3 +526,110 @@ class AbstractCluster(abc.ABC):
         if self.execution_list != []:
             # Free the resources
             self.free_resources()
+
+        self.num_of_events += 1
+
+        if self.tracer is not None:
+            self.tracer(self)
+
+        if self.snapshot_path is not None and self.num_of_events % self.snapshot_interval == 0:
+            save_snapshot(self, self.snapshot_path)
+
+    def run(self,
+            until_time: Optional[float] = None,
+            max_events: Optional[int] = None,
+            callback: Optional[Callable[['AbstractCluster'], None]] = None,
+            callback_interval: int = 1) -> bool:
+        """Execute steps of the simulation until every job has finished.
+
+        - until_time: stop as soon as the makespan reaches this point in time
+
+        - max_events: stop after this number of steps
+
+        - callback: called with the cluster every `callback_interval` steps
+
+        Return True if every job finished or False if the simulation stopped
+        early; calling run again continues the simulation. Raise
+        SimulationStalled or BudgetExceeded if the watchdog of the run aborts
+        it.
+        """
+
+        if callback_interval <= 0:
+            raise RuntimeError(f"Callback interval should be positive: {callback_interval}")
+
+        step = self.step
+        check = self.watchdog().check
+        preloaded_queue = self.preloaded_queue
+        waiting_queue = self.waiting_queue
+
+        if until_time is None:
+            until_time = math.inf
+        if max_events is None:
+            max_events = -1
+
+        events = 0
+
+        # The execution list is re-assigned by some schedulers, so it is read
+        # from the cluster at every step
+        while self.preloaded_cursor < len(preloaded_queue) or waiting_queue or self.execution_list:
+
+            if self.makespan >= until_time or events == max_events:
+                return False
+
+            step()
+            events += 1
+
+            check()
+
+            if callback is not None and events % callback_interval == 0:
+                callback(self)
+
+        return True
+
+    def events(self,
+               until_time: Optional[float] = None,
+               max_events: Optional[int] = None,
+               keep_log: bool = False) -> Iterator[Delta]:
+        """Execute the simulation like `run` and yield the state deltas of the
+        jobs as they happen; arrivals, starts, changes of speedup or cores and
+        finishes. Only the deltas of the current step are kept in memory.
+
+        The deltas replace the events of the logger, which grow at every
+        step, so the logger stops recording while streaming unless `keep_log`
+        is set.
+        """
+
+        step = self.step
+        check = self.watchdog().check
+        preloaded_queue = self.preloaded_queue
+        waiting_queue = self.waiting_queue
+
+        if until_time is None:
+            until_time = math.inf
+        if max_events is None:
+            max_events = -1
+
+        events = 0
+
+        deltas: list[Delta] = list()
+        self.deltas = deltas
+
+        recording = self.logger.recording
+        self.logger.recording = recording and keep_log
+
+        try:
+            while self.preloaded_cursor < len(preloaded_queue) or waiting_queue or self.execution_list:
+
+                if self.makespan >= until_time or events == max_events:
+                    return
+
+                step()
+                events += 1
+
+                check()
+
+                yield from deltas
+                deltas.clear()
+        finally:
+            self.deltas = None
+            self.logger.recording = recording
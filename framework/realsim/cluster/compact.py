@@ -0,0 +1,214 @@
+# Set path for local lib
+import os
+import sys
+sys.path.append(
+        os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+)
+
+from realsim.cluster.exhaustive import ClusterExhaustive
+from realsim.jobs import Job, ExecutionUnit
+from realsim.scheduler.compact import CompactScheduler
+
+from bisect import bisect_right
+from collections import deque
+import math
+from typing import Callable, Optional
+
+from numpy import ndarray
+
+
+class ClusterCompact(ClusterExhaustive):
+    """ClusterExhaustive with a fast path for the default scheduler. Without
+    co-location the simulation is list scheduling of full node jobs; at every
+    event the waiting jobs are visited in the order they arrived and every job
+    that fits in the free cores is deployed.
+
+    The fast path keeps the waiting jobs in a queue per number of needed
+    cores, so the first job that fits is found among the heads of the queues
+    instead of scanning and copying the whole waiting queue, and it does not
+    create execution units; the jobs bind their nodes in the node map
+    directly. The completions are kept in the same event queue as
+    ClusterExhaustive, so the makespan, the start and end times of every job,
+    the nodes they bind and the logged events are the same.
+
+    The fast path is taken by `run` when the scheduler is a CompactScheduler
+    and nothing observes the individual steps; no stop conditions, callback,
+    tracer, snapshots or budgets. Otherwise the cluster behaves exactly like
+    ClusterExhaustive.
+    """
+
+    def __init__(self, nodes, cores_per_node, tick=None):
+        ClusterExhaustive.__init__(self,
+                                   nodes=nodes,
+                                   cores_per_node=cores_per_node,
+                                   tick=tick)
+
+    def has_fast_path(self) -> bool:
+        """True if the rest of the simulation can run on the fast path
+        """
+        scheduler_cls = type(self.scheduler)
+        return (isinstance(self.scheduler, CompactScheduler)
+                and scheduler_cls.deploy is CompactScheduler.deploy
+                and scheduler_cls.scheduling_signature is CompactScheduler.scheduling_signature
+                and self.tracer is None
+                and self.snapshot_path is None
+                and self.wall_time_budget is None
+                and self.events_budget is None
+                and self.deltas is None
+                and all(unit.compact for unit in self.execution_list))
+
+    def run(self,
+            until_time: Optional[float] = None,
+            max_events: Optional[int] = None,
+            callback: Optional[Callable[['ClusterCompact'], None]] = None,
+            callback_interval: int = 1) -> bool:
+
+        if (until_time is None and max_events is None and callback is None
+                and self.has_fast_path()):
+            self.run_compact()
+            return True
+
+        return ClusterExhaustive.run(self,
+                                     until_time=until_time,
+                                     max_events=max_events,
+                                     callback=callback,
+                                     callback_interval=callback_interval)
+
+    def run_compact(self) -> None:
+        """Execute the rest of the simulation on the fast path
+        """
+
+        logger = self.logger
+        cluster_events = logger.cluster_events
+        preloaded_queue = self.preloaded_queue
+        waiting_queue = self.waiting_queue
+        total_cores = self.total_cores
+        node_map = self.node_map
+        cores_per_node = self.cores_per_node
+
+        # Needed cores --> waiting jobs in the order they arrived
+        queues: dict[int, deque[tuple[int, Job]]] = dict()
+        # Sorted numbers of needed cores of the queues
+        sizes: list[int] = list()
+        # Number of entries in the queues
+        entries = 0
+
+        def enqueue(job: Job) -> None:
+            nonlocal entries
+            size = self.full_node_cores(job)
+            if size not in queues:
+                queues[size] = deque()
+                sizes.insert(bisect_right(sizes, size), size)
+            queues[size].append((entries, job))
+            entries += 1
+
+        # Jobs that are waiting or executing when the fast path starts
+        for job in waiting_queue:
+            enqueue(job)
+
+        # Job id --> execution unit of the jobs that are already executing
+        xunits: dict[int, ExecutionUnit] = {unit.head.job_id: unit
+                                            for unit in self.execution_list}
+        # Job id --> job deployed by the fast path
+        executing: dict[int, Job] = dict()
+        # Job id --> nodes binded by a job deployed by the fast path
+        binded_nodes: dict[int, ndarray] = dict()
+        running = len(xunits)
+
+        def signature() -> tuple:
+            # The scheduling signature of the CompactScheduler; the free cores
+            # and the cores of the smallest waiting job
+            smallest = next((size for size in sizes if queues[size]), 0)
+            return (self.free_cores, smallest)
+
+        # Signature of the last deployment that failed, as in `step`
+        failed = self.failed_signature
+
+        while self.preloaded_cursor < len(preloaded_queue) or waiting_queue or running > 0:
+
+            if self.free_cores < 0 or self.free_cores > total_cores:
+                raise RuntimeError(f"Free cores: {self.free_cores}")
+
+            # Arrivals
+            cursor = self.preloaded_cursor
+            self.load_in_waiting_queue()
+            if self.preloaded_cursor > cursor:
+                for i in range(cursor, self.preloaded_cursor):
+                    enqueue(preloaded_queue[i])
+
+            if waiting_queue and failed is not None and failed == signature():
+                cluster_events["deploying:skipped"] += 1
+
+            elif waiting_queue:
+
+                deployed = False
+
+                # Deploy the first waiting job that fits until none fits
+                while True:
+                    first = None
+                    for size in sizes[:bisect_right(sizes, self.free_cores)]:
+                        queue = queues[size]
+                        if queue and (first is None or queue[0][0] < first[0][0]):
+                            first = queue
+
+                    if first is None:
+                        break
+
+                    _, job = first.popleft()
+                    waiting_queue.remove(job)
+                    job.binded_cores = self.full_node_cores(job)
+
+                    # The same nodes as `allocate` binds to a compact unit
+                    nodes = node_map.first_fit(job.binded_cores // cores_per_node)
+                    if nodes is None:
+                        raise RuntimeError(f"Not enough free nodes for {job}")
+                    node_map.allocate(nodes)
+                    binded_nodes[job.job_id] = nodes
+                    self.free_cores -= job.binded_cores
+
+                    job.start(self)
+                    self.reschedule(job)
+                    executing[job.job_id] = job
+                    running += 1
+                    deployed = True
+
+                if not deployed:
+                    failed = signature()
+
+            logger.evt_compact_jobs_executing(
+                    [unit.head for unit in xunits.values()] + list(executing.values())
+            )
+
+            # Find the earliest completion of an executing job or the earliest
+            # time a job shows up in the waiting queue, and the jobs that
+            # complete at that point in time
+            elapsed, finishing = self.next_event()
+
+            if elapsed == math.inf and waiting_queue:
+                print(f"Infinity : {waiting_queue} {self.execution_list}")
+                raise RuntimeError("Execution list is empty but the waiting queue still has jobs.")
+
+            self.advance(elapsed)
+
+            if finishing:
+                self.xunits_version += 1
+
+            for job_id in finishing:
+                unit = xunits.pop(job_id, None)
+                if unit is not None:
+                    # A unit deployed before the fast path started
+                    self.execution_list.remove(unit)
+                    self.xunit_of.pop(job_id, None)
+                    job = unit.head
+                    unit.finish({job_id})
+                    self.release(unit)
+                else:
+                    job = executing.pop(job_id)
+                    node_map.release(binded_nodes.pop(job_id))
+                    self.free_cores += job.binded_cores
+                self.job_finished(job)
+                running -= 1
+
+            self.num_of_events += 1
+
+        self.failed_signature = failed
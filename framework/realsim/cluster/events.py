@@ -0,0 +1,99 @@
+"""
+Priority queue of job completion events used by the clusters to find the next
+point in time where the state of the simulation changes
+"""
+
+import heapq
+import math
+from typing import NamedTuple, Optional
+
+
+class EventQueue:
+    """Min-heap of completion events keyed by the absolute time a job is
+    expected to finish. Rescheduling a job does not search the heap; the old
+    entry is left behind and discarded lazily when it reaches the top.
+
+    Only jobs with equal completion times complete together. Times that
+    differ by floating point round-off are merged only by a cluster with a
+    tick time base, which rounds every time to a whole number of ticks.
+    """
+
+    def __init__(self):
+        # Heap of (finish time, job id) entries
+        self.heap: list[tuple[float, int]] = list()
+        # job id --> finish time of the valid entry of a job
+        self.scheduled: dict[int, float] = dict()
+
+    def __len__(self) -> int:
+        return len(self.scheduled)
+
+    def __contains__(self, job_id: int) -> bool:
+        return job_id in self.scheduled
+
+    def clear(self) -> None:
+        self.heap = list()
+        self.scheduled = dict()
+
+    def schedule(self, job_id: int, time: float) -> None:
+        """Set the completion time of a job; any previous entry becomes stale
+        """
+        self.scheduled[job_id] = time
+        heapq.heappush(self.heap, (time, job_id))
+
+    def cancel(self, job_id: int) -> None:
+        self.scheduled.pop(job_id, None)
+
+    def is_scheduled(self, job_id: int, time: float) -> bool:
+        """Check if a job is set to complete at the given time
+        """
+        return self.scheduled.get(job_id) == time
+
+    def _discard_stale(self) -> None:
+        heap = self.heap
+        while heap:
+            time, job_id = heap[0]
+            if self.scheduled.get(job_id) == time:
+                return
+            heapq.heappop(heap)
+
+    def peek(self) -> float:
+        """Return the time of the earliest completion or infinity if there
+        are no scheduled jobs
+        """
+        self._discard_stale()
+        if self.heap == []:
+            return math.inf
+        return self.heap[0][0]
+
+    def pop_until(self, time: float) -> list[int]:
+        """Remove and return the ids of all the jobs that complete up to and
+        including `time`
+        """
+        due: list[int] = list()
+        heap = self.heap
+        while True:
+            self._discard_stale()
+            if heap == [] or heap[0][0] > time:
+                break
+            _, job_id = heapq.heappop(heap)
+            del self.scheduled[job_id]
+            due.append(job_id)
+        return due
+
+
+# Kinds of state deltas of a simulation
+ARRIVAL = "arrival"  # the job entered the waiting queue
+START = "start"  # the job started executing
+CHANGE = "change"  # the speedup or the cores of an executing job changed
+FINISH = "finish"  # the job finished executing
+
+
+class Delta(NamedTuple):
+    """A change of the state of a job at a point in time of the simulation
+    """
+    kind: str
+    time: float
+    job_id: int
+    binded_cores: int
+    speedup: float
+    finish_time: Optional[float]
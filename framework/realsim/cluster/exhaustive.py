@@ -6,35 +6,27 @@ sys.path.append(
 )
 
 from realsim.cluster.abstract import AbstractCluster
-from realsim.jobs import Job, EmptyJob
-from realsim.jobs.utils import deepcopy_list
+from realsim.cluster.events import CHANGE
 
 import math
 
 
 class ClusterExhaustive(AbstractCluster):
 
-    def __init__(self, nodes, cores_per_node):
+    def __init__(self, nodes, cores_per_node, tick=None):
         AbstractCluster.__init__(self, 
                                  nodes=nodes, 
-                                 cores_per_node=cores_per_node)
+                                 cores_per_node=cores_per_node,
+                                 tick=tick)
 
     def next_state(self):
         """Execute the jobs in the execution list
         """
 
-        # Find smallest remaining time of executing jobs
-        min_rem_time = math.inf
-        for unit in self.execution_list:
-            for job in unit:
-                if type(job) != EmptyJob and job.remaining_time < min_rem_time:
-                    min_rem_time = job.remaining_time
-
-        # Find smallest remaining time for a job to show up in the waiting queue
-        for job in self.preloaded_queue:
-            showup_time = job.queued_time - self.makespan
-            if showup_time > 0 and showup_time < min_rem_time:
-                min_rem_time = showup_time
+        # Find the earliest completion of an executing job or the earliest
+        # time a job shows up in the waiting queue, and the jobs that complete
+        # at that point in time
+        min_rem_time, finishing = self.next_event()
 
         assert min_rem_time >= 0
 
@@ -42,120 +34,70 @@ class ClusterExhaustive(AbstractCluster):
             print(f"Infinity : {self.waiting_queue} {self.execution_list}")
             raise RuntimeError("Execution list is empty but the waiting queue still has jobs.")
 
-        # Increase the overall cluster runtime
-        self.makespan += min_rem_time
-
-        # Increase the waiting/queued time of each job in the waiting queue
-        for job in self.waiting_queue:
-            job.waiting_time += min_rem_time
-
-        # Create a new execution list
-        execution_list: list[list[Job]] = list()
+        # Increase the overall cluster runtime; the remaining and waiting times
+        # of the jobs follow the cluster's clock
+        self.advance(min_rem_time)
 
-        # Remove the smallest remaining time and if a job hits zero
-        # then substitute it with an EmptyJob instance
-        for execution_unit in self.execution_list:
+        self.complete_jobs(finishing)
 
-            substitute_unit = list()
-            empty_jobs = list()
-
-            # Set as first job in substitute unit the non empty job
-            # with the highest amount of binded cores
-            max_binded_cores = -1
-
-            for job in execution_unit:
+    def complete_jobs(self, finishing: set[int]) -> None:
+        """Remove the jobs that finished from their execution units and
+        recalculate the speedups of the jobs that remain in those units
+        """
 
-                if type(job) != EmptyJob:
-                    job.remaining_time -= min_rem_time
-                    if job.remaining_time == 0:
-                        # Record in logger
-                        self.logger.evt_job_finishes(job)
-                        # Convert to an empty job
-                        job = EmptyJob(job)
+        # Remove the finished jobs from their execution units; the execution
+        # units with no finished jobs remain as they are
+        for execution_unit in self.finishing_xunits(finishing):
 
-                # We may have to downsize the unit
-                # before adding it to the execution list we are building
+            head_job = execution_unit.head
 
-                # Set the largest non empty job as first in substitute_unit
-                if type(job) != EmptyJob:
-                    if job.binded_cores > max_binded_cores:
-                        substitute_unit.insert(0, job)
-                        max_binded_cores = job.binded_cores
-                    else:
-                        substitute_unit.append(job)
-                else:
-                    empty_jobs.append(job)
+            for job in execution_unit.finish(finishing):
+                self.job_finished(job)
 
-            # If there is any job still executing
-            if substitute_unit != []:
-            
-                if len(substitute_unit) > 1:
+            # The unit has more free cores or no longer executes
+            self.nonfilled_index.update(execution_unit)
 
-                    # Recalculate speedup of tail jobs
-                    for job in substitute_unit[1:]:
-                        if job.speedup != job.get_speedup(substitute_unit[0]):
-                            job.ratioed_remaining_time(substitute_unit[0])
+            # Every job of the unit has finished
+            if execution_unit.running == 0:
+                self.finished_xunits.append(execution_unit)
+                continue
 
-                    # Recalculate of head job
-                    worst_job = min(substitute_unit[1:], key=(
-                        lambda wjob: substitute_unit[0].get_speedup(wjob)
-                    ))
+            if execution_unit.cojobs != []:
 
-                    if substitute_unit[0].speedup != substitute_unit[0].get_speedup(worst_job):
-                        substitute_unit[0].ratioed_remaining_time(worst_job)
+                # The speedups of the tail jobs depend only on the head job;
+                # recalculate them only if a new head job was elected
+                if execution_unit.head is not head_job:
 
-                # TODO: MAYBE DOWNSIZE THE EXECUTION UNIT
-                # From empty jobs check if there is a job with amount of cores
-                # higher than our first job in substitute_unit and swap their
-                # number of binded cores
-                for empty_job in empty_jobs:
-                    if empty_job.binded_cores > substitute_unit[0].binded_cores:
-                        swap = empty_job.binded_cores
-                        empty_job.binded_cores = substitute_unit[0].binded_cores
-                        substitute_unit[0].binded_cores = swap
+                    head_job = execution_unit.head
 
-            # Extend substitute_unit with empty_jobs
-            substitute_unit.extend(empty_jobs)
+                    for job in execution_unit.cojobs:
+                        if job.speedup != job.get_speedup(head_job):
+                            job.ratioed_remaining_time(head_job)
+                            self.reschedule(job)
+                            if self.deltas is not None:
+                                self.record(CHANGE, job)
 
-            # Add the substitute_unit in the new execution list
-            execution_list.append(substitute_unit)
+                # Recalculate of head job
+                worst_job = min(execution_unit.cojobs, key=(
+                    lambda wjob: head_job.get_speedup(wjob)
+                ))
 
-        # Replace execution list
-        self.execution_list = execution_list
+                if head_job.speedup != head_job.get_speedup(worst_job):
+                    head_job.ratioed_remaining_time(worst_job)
+                    self.reschedule(head_job)
+                    if self.deltas is not None:
+                        self.record(CHANGE, head_job)
 
+            # The completion times of the unit's jobs are up to date
+            execution_unit.dirty = False
 
     def free_resources(self):
-        """Find any EmptyJob instances and return the resources
-        to the cluster
+        """Return the resources of the execution units that finished to the
+        cluster
         """
 
-        execution_list = deepcopy_list(self.execution_list)
-
-        for execution_unit in self.execution_list:
-
-            finished = True
-
-            for job in execution_unit:
-
-                if type(job) != EmptyJob:
-                    finished = False
-                    break
-                else:
-                    self.finished_jobs.append(job.job_id)
-
-            if finished:
-                if len(execution_unit) == 1:
-                    self.free_cores += execution_unit[0].binded_cores
-                else:
-                    # Sort the jobs in execution unit by their number of binded
-                    # cores descendingly
-                    sorted_exec_unit = sorted(execution_unit, 
-                                              key=lambda job: job.binded_cores,
-                                              reverse=True)
-                    self.free_cores += 2 * sorted_exec_unit[0].binded_cores
-
-                # Remove finished units
-                execution_list.remove(execution_unit)
+        for execution_unit in self.finished_xunits:
+            self.release(execution_unit)
 
-        # Execution list re-assignment
-        self.execution_list = execution_list
+        # Remove finished units
+        self.remove_finished_xunits()
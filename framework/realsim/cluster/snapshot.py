@@ -0,0 +1,102 @@
+"""
+Snapshots of a running simulation. A snapshot holds the state of a cluster
+along with its scheduler and logger in a compressed binary file, so that a
+long simulation can be resumed after it was interrupted. The loads of the jobs
+are not stored; they are referenced by their name and resolved again when the
+snapshot is restored.
+"""
+
+import gzip
+import io
+import os
+import pickle
+import sys
+from typing import Callable, Mapping, Union
+
+sys.path.append(os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../../../')
+))
+
+from api.loader import Load
+
+
+# Anything that resolves the full name of a load to the Load instance; a
+# dictionary or a LoadManager
+Loads = Union[Mapping[str, Load], Callable[[str], Load]]
+
+
+class SnapshotPickler(pickle.Pickler):
+    """Pickler that replaces every Load with its full name
+    """
+
+    def __init__(self, file, protocol=pickle.HIGHEST_PROTOCOL):
+        pickle.Pickler.__init__(self, file, protocol=protocol)
+        # The loads that were replaced by their name
+        self.loads: dict[str, Load] = dict()
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Load):
+            self.loads[obj.full_load_name] = obj
+            return ("load", obj.full_load_name)
+        return None
+
+
+class SnapshotUnpickler(pickle.Unpickler):
+    """Unpickler that resolves the names of the loads through `loads`
+    """
+
+    def __init__(self, file, loads: Loads):
+        pickle.Unpickler.__init__(self, file)
+        self.loads = loads
+
+    def persistent_load(self, pid):
+        kind, name = pid
+        if kind != "load":
+            raise pickle.UnpicklingError(f"Unknown persistent id: {pid}")
+        if isinstance(self.loads, Mapping):
+            return self.loads[name]
+        return self.loads(name)
+
+
+def save_snapshot(cluster, path: str) -> None:
+    """Write the state of `cluster`, its scheduler and its logger to `path`.
+    The file is replaced atomically so an interruption while saving does not
+    destroy the previous snapshot.
+    """
+    tmp_path = f"{path}.tmp"
+
+    with gzip.open(tmp_path, "wb") as fd:
+        SnapshotPickler(fd).dump(cluster)
+
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: str, loads: Loads):
+    """Restore a cluster from the snapshot at `path`. The scheduler and the
+    logger are restored along with the cluster and are still assigned to it.
+    The simulation continues by calling `step` on the returned cluster.
+    """
+    with gzip.open(path, "rb") as fd:
+        return SnapshotUnpickler(fd, loads).load()
+
+
+def branch(cluster, scheduler=None):
+    """Return an independent copy of `cluster`, its scheduler and its logger
+    that continues the simulation from the current state. The copy shares the
+    loads with the original. If `scheduler` is provided then the copy
+    continues with it instead; its `setup` should be called before the next
+    step of the copy.
+    """
+    buffer = io.BytesIO()
+
+    pickler = SnapshotPickler(buffer)
+    pickler.dump(cluster)
+
+    buffer.seek(0)
+    copy = SnapshotUnpickler(buffer, pickler.loads).load()
+
+    if scheduler is not None:
+        copy.assign_scheduler(scheduler)
+        scheduler.assign_logger(copy.logger)
+
+    return copy
@@ -0,0 +1,155 @@
+"""
+State digests of a running simulation. A tracer hashes the state of a cluster
+after every step into a compact rolling digest, so that two engines or two
+versions of a scheduler can be checked to go through the same states. The
+first event where two traces diverge points to the step where the behavior
+changed.
+
+    python tracer.py reference.trace candidate.trace
+"""
+
+import hashlib
+from collections import deque
+from typing import NamedTuple, Optional, Sequence, Union
+
+
+class TraceEntry(NamedTuple):
+    """The digest of the state of a cluster after a step
+    """
+    event: int
+    makespan: float
+    free_cores: int
+    units: int
+    digest: str
+    rolling: str
+
+
+class StateTracer:
+    """Callable that records the digest of the state of a cluster; assigned to
+    a cluster with `set_tracer` or passed as the callback of `run`.
+
+    The state is the makespan, the free cores, the jobs of the waiting queue
+    in order and the members of every execution unit along with their
+    remaining times. The execution units are ordered by their head job so the
+    order of the execution list does not matter. Times are rounded to
+    `digits` decimal digits, so engines that differ only by floating point
+    noise produce the same trace.
+
+    - path: if provided, every entry is also written to this file
+    - keep: if provided, only the latest `keep` entries are kept in memory,
+      e.g. while streaming a long simulation; the rolling digest still covers
+      every step
+    """
+
+    def __init__(self, path: Optional[str] = None, digits: int = 6,
+                 keep: Optional[int] = None):
+        if keep is not None and keep <= 0:
+            raise RuntimeError(f"Number of kept entries should be positive: {keep}")
+        self.digits = digits
+        self.entries: Union[list[TraceEntry], deque[TraceEntry]] = \
+            list() if keep is None else deque(maxlen=keep)
+        self.rolling = hashlib.blake2b(digest_size=8).hexdigest()
+        self.fd = None if path is None else open(path, "w")
+
+    def __getstate__(self):
+        # The trace file stays with the original simulation
+        state = self.__dict__.copy()
+        state["fd"] = None
+        return state
+
+    def __call__(self, cluster) -> None:
+        digest = self.digest(cluster)
+        self.rolling = hashlib.blake2b(f"{self.rolling}{digest}".encode(),
+                                       digest_size=8).hexdigest()
+
+        entry = TraceEntry(cluster.num_of_events,
+                           round(cluster.makespan, self.digits),
+                           cluster.free_cores,
+                           len(cluster.execution_list),
+                           digest,
+                           self.rolling)
+        self.entries.append(entry)
+
+        if self.fd is not None:
+            self.fd.write(" ".join(map(str, entry)) + "\n")
+
+    def state(self, cluster) -> tuple:
+        """Return the state of the cluster that is hashed
+        """
+        digits = self.digits
+
+        units = list()
+        for unit in cluster.execution_list:
+            jobs = tuple(sorted((job.job_id, job.binded_cores,
+                                 round(job.remaining_time, digits))
+                                for job in unit))
+            units.append((unit.head.job_id, unit.free_cores, jobs))
+        units.sort()
+
+        return (round(cluster.makespan, digits),
+                cluster.free_cores,
+                tuple(job.job_id for job in cluster.waiting_queue),
+                tuple(units))
+
+    def digest(self, cluster) -> str:
+        """Return the digest of the state of the cluster
+        """
+        return hashlib.blake2b(repr(self.state(cluster)).encode(),
+                               digest_size=8).hexdigest()
+
+    def close(self) -> None:
+        if self.fd is not None:
+            self.fd.close()
+            self.fd = None
+
+
+def load_trace(path: str) -> list[TraceEntry]:
+    """Read a trace written by a StateTracer
+    """
+    entries: list[TraceEntry] = list()
+    with open(path) as fd:
+        for line in fd:
+            event, makespan, free_cores, units, digest, rolling = line.split()
+            entries.append(TraceEntry(int(event), float(makespan),
+                                      int(free_cores), int(units),
+                                      digest, rolling))
+    return entries
+
+
+def diff_traces(reference: Sequence[TraceEntry],
+                candidate: Sequence[TraceEntry]) -> Optional[tuple[Optional[TraceEntry], Optional[TraceEntry]]]:
+    """Return the entries of the first event where the two traces diverge or
+    None if they are the same. If one trace is a prefix of the other then the
+    entry of the shorter trace is None.
+    """
+    for ref, cand in zip(reference, candidate):
+        if ref.rolling != cand.rolling:
+            return ref, cand
+
+    if len(reference) > len(candidate):
+        return reference[len(candidate)], None
+    if len(candidate) > len(reference):
+        return None, candidate[len(reference)]
+
+    return None
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        print(f"Usage: {sys.argv[0]} <reference trace> <candidate trace>")
+        sys.exit(2)
+
+    divergence = diff_traces(load_trace(sys.argv[1]), load_trace(sys.argv[2]))
+
+    if divergence is None:
+        print("The traces are the same")
+        sys.exit(0)
+
+    ref, cand = divergence
+    event = ref.event if ref is not None else cand.event
+    print(f"First divergent event: {event}")
+    print(f"  reference: {ref}")
+    print(f"  candidate: {cand}")
+    sys.exit(1)
@@ -0,0 +1,156 @@
+"""
+Transactions over the state of a cluster. A scheduler applies tentative
+deployments through a transaction, reads the state of the cluster as if they
+had happened and then either keeps them or rolls them back. The transaction
+only records what changed, so trying an alternative costs as much as the
+changes it makes instead of a copy of the whole cluster.
+"""
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from realsim.jobs import Job, ExecutionUnit
+
+
+# Fields of a job that a scheduler changes while deploying it
+JOB_FIELDS = ("binded_cores", "speedup", "_remaining_time", "progress_time",
+              "finish_time")
+
+# Fields of an execution unit that change when co-jobs are added
+XUNIT_FIELDS = ("head", "binded_cores", "free_cores", "running", "finished",
+                "compact", "dirty")
+
+
+class Transaction:
+    """Journal of the changes a scheduler makes to a cluster. The changes are
+    applied to the cluster immediately, so the free cores, the waiting queue,
+    the execution list and the node map always show the tentative state.
+
+    - take(job): remove a job from the waiting queue
+
+    - save(job): keep the state of a job before changing its binded cores or
+      speedup
+
+    - add(xunit, job): add a co-job to an execution unit
+
+    - deploy(xunit): allocate an execution unit and append it to the
+      execution list
+
+    - commit(): keep the changes
+
+    - rollback(): undo the changes in reverse order
+
+    Used as a context manager the changes are rolled back on exit unless they
+    were committed, so lookahead needs no explicit cleanup:
+
+        with cluster.transaction() as tx:
+            tx.take(job)
+            ...
+            if better:
+                tx.commit()
+    """
+
+    def __init__(self, cluster):
+        self.cluster = cluster
+        # Undo records in the order the changes were made
+        self.journal: list[tuple] = list()
+        # Ids of the jobs and units whose state has been saved
+        self.saved: set[int] = set()
+        self.closed = False
+
+    def __enter__(self) -> 'Transaction':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if not self.closed:
+            self.rollback()
+
+    def check(self) -> None:
+        if self.closed:
+            raise RuntimeError("The transaction has already been committed or rolled back")
+
+    def take(self, job: Job) -> None:
+        """Remove a job from the waiting queue of the cluster
+        """
+        self.check()
+        waiting_queue = self.cluster.waiting_queue
+        entry = waiting_queue.entry(job)
+        waiting_queue.remove(job)
+        self.journal.append(("take", job, entry))
+
+    def save(self, job: Job) -> None:
+        """Keep the state of a job before the scheduler changes it
+        """
+        self.check()
+        if id(job) in self.saved:
+            return
+        self.saved.add(id(job))
+        self.journal.append(("job", job, tuple(getattr(job, field) for field in JOB_FIELDS)))
+
+    def add(self, xunit: ExecutionUnit, job: Job) -> None:
+        """Add a co-job to an execution unit
+        """
+        self.check()
+        if id(xunit) not in self.saved:
+            self.saved.add(id(xunit))
+            self.journal.append(("xunit", xunit, list(xunit.cojobs),
+                                 tuple(getattr(xunit, field) for field in XUNIT_FIELDS)))
+        xunit.add(job)
+
+    def deploy(self, xunit: ExecutionUnit) -> None:
+        """Allocate the nodes of an execution unit and append it to the
+        execution list of the cluster
+        """
+        self.check()
+        self.cluster.allocate(xunit)
+        self.cluster.execution_list.append(xunit)
+        self.journal.append(("deploy", xunit))
+
+    def commit(self) -> None:
+        """Keep the changes of the transaction
+        """
+        self.check()
+        self.journal.clear()
+        self.closed = True
+
+    def rollback(self) -> None:
+        """Undo the changes of the transaction, the latest first
+        """
+        self.check()
+
+        cluster = self.cluster
+        taken: list[tuple[Job, int]] = list()
+
+        for record in reversed(self.journal):
+            kind = record[0]
+
+            if kind == "take":
+                taken.append((record[1], record[2]))
+
+            elif kind == "job":
+                _, job, values = record
+                for field, value in zip(JOB_FIELDS, values):
+                    setattr(job, field, value)
+
+            elif kind == "xunit":
+                _, xunit, cojobs, values = record
+                xunit.cojobs = cojobs
+                for field, value in zip(XUNIT_FIELDS, values):
+                    setattr(xunit, field, value)
+
+            elif kind == "deploy":
+                xunit = record[1]
+                execution_list = cluster.execution_list
+                if execution_list and execution_list[-1] is xunit:
+                    execution_list.pop()
+                else:
+                    execution_list.remove(xunit)
+                cluster.release(xunit)
+
+        # Put the jobs back in the waiting queue at once
+        if taken != []:
+            cluster.waiting_queue.restore(taken)
+
+        self.journal.clear()
+        self.closed = True
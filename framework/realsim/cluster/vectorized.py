@@ -0,0 +1,87 @@
+# Set path for local lib
+import os
+import sys
+sys.path.append(
+        os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+)
+
+from realsim.cluster.exhaustive import ClusterExhaustive
+from realsim.jobs import Job
+from realsim.jobs.table import JobTable, TableJob
+
+import math
+
+
+class ClusterExhaustiveVectorized(ClusterExhaustive):
+    """ClusterExhaustive whose jobs are views over a JobTable. The search for
+    the next completion and the detection of the jobs that finish are array
+    operations over the rows of the executing jobs instead of a priority queue
+    of events; the advance of time is the update of the cluster's clock that
+    the virtual clocks of the jobs follow, so no row changes when time
+    advances.
+    """
+
+    def __init__(self, nodes, cores_per_node, tick=None):
+        ClusterExhaustive.__init__(self,
+                                   nodes=nodes,
+                                   cores_per_node=cores_per_node,
+                                   tick=tick)
+
+        # State of every job preloaded to the cluster
+        self.table = JobTable()
+        # Job id --> finish time the cluster last saw for every executing job;
+        # a different finish time means the job changed its speedup
+        self.scheduled: dict[int, float] = dict()
+
+    def preload_jobs(self, jobs_set: list[Job]) -> None:
+        ClusterExhaustive.preload_jobs(self, jobs_set)
+
+        # Move the state of the new jobs inside the table
+        preloaded_queue = self.preloaded_queue
+        for i in range(self.preloaded_cursor, len(preloaded_queue)):
+            job = preloaded_queue[i]
+            if not isinstance(job, TableJob) or job.table is not self.table:
+                preloaded_queue[i] = self.table.view(job)
+
+    def is_scheduled(self, job: Job) -> bool:
+        return self.scheduled.get(job.job_id) == job.finish_time
+
+    def reschedule(self, job: Job) -> None:
+        # The finish time of the job is already stored in the table
+        self.scheduled[job.job_id] = job.finish_time
+
+    def next_completion(self):
+        return self.event_key(self.table.next_finish())
+
+    def pop_completions(self, key) -> list[int]:
+        # The jobs stay executing inside the table until they finish
+        job_ids = self.table.due(self.event_time(key))
+        for job_id in job_ids:
+            del self.scheduled[job_id]
+        return job_ids
+
+    def setup(self):
+        ClusterExhaustive.setup(self)
+        self.scheduled = dict()
+
+    def next_state(self):
+        """Execute the jobs in the execution list
+        """
+
+        # Find the earliest completion of an executing job or the earliest
+        # time a job shows up in the waiting queue, and the jobs that complete
+        # at that point in time
+        min_rem_time, finishing = self.next_event()
+
+        assert min_rem_time >= 0
+
+        if min_rem_time == math.inf and self.waiting_queue != []:
+            print(f"Infinity : {self.waiting_queue} {self.execution_list}")
+            raise RuntimeError("Execution list is empty but the waiting queue still has jobs.")
+
+        self.table.finish(finishing)
+
+        # Increase the overall cluster runtime
+        self.advance(min_rem_time)
+
+        self.complete_jobs(finishing)
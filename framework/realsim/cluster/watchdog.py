@@ -0,0 +1,113 @@
+"""
+Watchdog of the simulation loop. It stops simulations that no longer make
+progress or that exceed their wall-clock or event budgets, instead of letting
+them spin forever.
+"""
+
+from itertools import islice
+import time
+from typing import Optional
+
+
+class SimulationStalled(RuntimeError):
+    """The simulation repeats the same state without advancing in time
+    """
+    pass
+
+
+class BudgetExceeded(RuntimeError):
+    """The simulation exceeded its wall-clock or events budget
+    """
+    pass
+
+
+class Watchdog:
+    """Checks the progress of a cluster after every step of a run.
+
+    - stall_steps: number of steps that repeat an already seen state of the
+      cluster, without the makespan advancing, before the simulation is
+      considered stalled
+
+    - wall_time: seconds of real time the run may take
+
+    - max_events: number of events the cluster may reach
+    """
+
+    def __init__(self,
+                 cluster,
+                 stall_steps: int = 1000,
+                 wall_time: Optional[float] = None,
+                 max_events: Optional[int] = None):
+        self.cluster = cluster
+        self.stall_steps = stall_steps
+        self.max_events = max_events
+
+        self.deadline: Optional[float] = None
+        if wall_time is not None:
+            self.deadline = time.monotonic() + wall_time
+
+        # Makespan at the last time it advanced
+        self.makespan = cluster.makespan
+        # States seen since the makespan last advanced
+        self.seen: set[tuple] = set()
+        # Number of steps that repeated a seen state
+        self.repeats = 0
+
+    def check(self) -> None:
+        """Raise if the cluster is stalled or over its budgets
+        """
+        cluster = self.cluster
+
+        if self.max_events is not None and cluster.num_of_events > self.max_events:
+            raise BudgetExceeded(f"Exceeded the budget of {self.max_events} events\n{self.dump()}")
+
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExceeded(f"Exceeded the wall-clock budget\n{self.dump()}")
+
+        if cluster.makespan != self.makespan:
+            self.makespan = cluster.makespan
+            self.seen.clear()
+            self.repeats = 0
+            return
+
+        state = (cluster.free_cores,
+                 cluster.waiting_queue.version,
+                 cluster.xunits_version,
+                 cluster.preloaded_cursor,
+                 len(cluster.execution_list),
+                 len(cluster.finished_jobs))
+
+        if state in self.seen:
+            self.repeats += 1
+            if self.repeats >= self.stall_steps:
+                raise SimulationStalled(f"No progress for {self.repeats} steps\n{self.dump()}")
+        else:
+            self.seen.add(state)
+
+    def dump(self) -> str:
+        """Return a description of the state of the cluster for diagnostics
+        """
+        cluster = self.cluster
+
+        # The first waiting jobs without copying the whole queue
+        waiting_queue = list(islice(cluster.waiting_queue, 10))
+
+        lines = [
+            f"Scheduler: {cluster.scheduler.name}",
+            f"Makespan: {cluster.makespan}",
+            f"Events: {cluster.num_of_events}",
+            f"Free cores: {cluster.free_cores}/{cluster.total_cores}",
+            f"Preloaded jobs left: {len(cluster.preloaded_queue) - cluster.preloaded_cursor}",
+            f"Waiting jobs: {len(cluster.waiting_queue)} {waiting_queue}",
+            f"Execution units: {len(cluster.execution_list)} {cluster.execution_list[:10]}",
+            f"Finished jobs: {len(cluster.finished_jobs)}",
+            f"Signature of the last failed deployment: {cluster.failed_signature}",
+        ]
+
+        if hasattr(cluster, "logger") and hasattr(cluster.logger, "cluster_events"):
+            counters = {key: value
+                        for key, value in cluster.logger.cluster_events.items()
+                        if key.startswith("deploying")}
+            lines.append(f"Deployments: {counters}")
+
+        return "\n".join(lines)
@@ -0,0 +1,102 @@
+"""
+Index of the non-filled execution units of a cluster. The units are kept
+sorted by the number of their free cores, so the units that can fit a job are
+found with a binary search instead of a scan of the execution list.
+"""
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from realsim.jobs import ExecutionUnit
+
+from bisect import bisect_left, insort
+
+
+class XunitIndex:
+    """Sorted container of the non-filled execution units keyed by their free
+    cores; on equal free cores the unit that entered the index first comes
+    first. The index is updated by the cluster whenever the members of a unit
+    change.
+    """
+
+    def __init__(self):
+        # Sorted keys (free cores, entry number) of the indexed units
+        self.keys: list[tuple[int, int]] = list()
+        # Entry number --> execution unit
+        self.units: dict[int, ExecutionUnit] = dict()
+        # Id of an execution unit --> its key
+        self.key_of: dict[int, tuple[int, int]] = dict()
+        # Number of units that have entered the index
+        self.counter: int = 0
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # The ids of the units are different after they are restored
+        self.key_of = {id(self.units[entry]): (free_cores, entry)
+                       for free_cores, entry in self.keys}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __iter__(self):
+        """Iterate over the units from the fewest to the most free cores
+        """
+        units = self.units
+        for _, entry in self.keys:
+            yield units[entry]
+
+    def __contains__(self, unit: ExecutionUnit) -> bool:
+        return id(unit) in self.key_of
+
+    def update(self, unit: ExecutionUnit) -> None:
+        """Index the unit if it is non-filled, otherwise remove it
+        """
+        key = self.key_of.get(id(unit))
+
+        if not unit.is_nonfilled():
+            if key is not None:
+                self.remove(unit)
+            return
+
+        if key is not None:
+            if key[0] == unit.free_cores:
+                return
+            # Keep the entry number of the unit
+            del self.keys[bisect_left(self.keys, key)]
+            entry = key[1]
+        else:
+            entry = self.counter
+            self.counter += 1
+            self.units[entry] = unit
+
+        key = (unit.free_cores, entry)
+        insort(self.keys, key)
+        self.key_of[id(unit)] = key
+
+    def remove(self, unit: ExecutionUnit) -> None:
+        """Remove the unit from the index
+        """
+        key = self.key_of.pop(id(unit))
+        del self.keys[bisect_left(self.keys, key)]
+        del self.units[key[1]]
+
+    def fitting(self, cores: int) -> list[ExecutionUnit]:
+        """Return the units with at least `cores` free cores; best fit first
+        """
+        units = self.units
+        start = bisect_left(self.keys, (cores, -1))
+        return [units[entry] for _, entry in self.keys[start:]]
+
+    def nonfitting(self, cores: int) -> list[ExecutionUnit]:
+        """Return the units with fewer than `cores` free cores
+        """
+        units = self.units
+        end = bisect_left(self.keys, (cores, -1))
+        return [units[entry] for _, entry in self.keys[:end]]
+
+    def clear(self) -> None:
+        self.keys.clear()
+        self.units.clear()
+        self.key_of.clear()
+        self.counter = 0
@@ -1 +1,3 @@
 from .jobs import Job, EmptyJob
+from .xunit import ExecutionUnit
+from .queue import WaitingQueue
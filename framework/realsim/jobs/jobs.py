@@ -16,6 +16,12 @@ from numpy import isnan
 
 class Job:
 
+    __slots__ = ("load", "job_id", "job_name", "num_of_processes",
+                 "queued_time", "wall_time", "binded_cores", "gave_position",
+                 "speedup", "half_node_cores", "full_node_cores", "clock",
+                 "_remaining_time", "progress_time", "finish_time",
+                 "_waiting_time", "waiting_since", "load_index")
+
     def __init__(self, 
                  load: Optional[Load], 
                  job_id: int, 
@@ -33,9 +39,7 @@ class Job:
         self.job_id = job_id
         self.job_name = job_name
         self.num_of_processes = num_of_processes
-        self.remaining_time = remaining_time
         self.queued_time = queued_time
-        self.waiting_time = waiting_time
         self.wall_time = wall_time
         self.binded_cores = binded_cores
         self.gave_position = 0
@@ -45,12 +49,82 @@ class Job:
         self.half_node_cores = half_node_cores
         self.full_node_cores = full_node_cores
 
+        # Virtual clock of the job's progress. The remaining and waiting times
+        # are not advanced at every step of the simulation but are computed
+        # from the current time of `clock` (usually the cluster the job was
+        # submitted to) as the distance of the finish time from it and the
+        # time since the job entered the waiting queue. They differ from the
+        # times of a job advanced at every step only by floating point
+        # round-off (see COMPLETION_TOLERANCE of the cluster).
+        self.clock = None
+        # Remaining time at the last change of speedup
+        self._remaining_time = remaining_time
+        # Point in time of the last change of speedup while executing
+        self.progress_time = None
+        # Projected point in time the job finishes executing
+        self.finish_time = None
+        # Waiting time accumulated before the job entered the waiting queue
+        self._waiting_time = waiting_time
+        # Point in time the waiting time was last updated
+        self.waiting_since = None
+        # Index of the job's load in the heatmap of a co-scheduler
+        self.load_index: Optional[int] = None
+
+    @property
+    def remaining_time(self):
+        if self.progress_time is None:
+            return self._remaining_time
+        return self.finish_time - self.clock.makespan
+
+    @remaining_time.setter
+    def remaining_time(self, remaining_time):
+        self._remaining_time = remaining_time
+        if self.progress_time is not None:
+            self.progress_time = self.clock.makespan
+            self.finish_time = self.clock.snap(self.progress_time + remaining_time)
+
+    @property
+    def waiting_time(self):
+        if self.waiting_since is None:
+            return self._waiting_time
+        return self._waiting_time + (self.clock.makespan - self.waiting_since)
+
+    @waiting_time.setter
+    def waiting_time(self, waiting_time):
+        self._waiting_time = waiting_time
+        if self.waiting_since is not None:
+            self.waiting_since = self.clock.makespan
+
+    def submit(self, clock) -> None:
+        """The job entered the waiting queue; its waiting time advances along
+        with the clock
+        """
+        self.clock = clock
+        self.waiting_since = clock.makespan
+
+    def start(self, clock) -> None:
+        """The job started executing; its remaining time decreases along with
+        the clock
+        """
+        # Freeze the waiting time
+        self._waiting_time = self.waiting_time
+        self.waiting_since = None
+
+        self.clock = clock
+        self.progress_time = clock.makespan
+        self.finish_time = clock.snap(self.progress_time + self._remaining_time)
+
     def __eq__(self, job):
+        # A job and its copies are the same job; the job id is unique inside
+        # a cluster
+        if self is job:
+            return True
         if not isinstance(job, Job):
             return False
-        return self.load == job.load and self.job_id == job.job_id and self.job_name == job.job_name and self.num_of_processes == job.num_of_processes\
-                and self.remaining_time == job.remaining_time and self.queued_time == job.queued_time\
-                and self.wall_time == job.wall_time and self.speedup == job.speedup
+        return self.job_id == job.job_id
+
+    def __hash__(self):
+        return hash(self.job_id)
 
     def __repr__(self) -> str:
         return "{" + f"{self.job_id}, {self.job_name} : {self.remaining_time}, {self.speedup}, {self.binded_cores}" + "}"
@@ -94,19 +168,27 @@ class Job:
                    binded_cores=self.binded_cores,
                    half_node_cores=self.half_node_cores,
                    full_node_cores=self.full_node_cores,
-                   remaining_time=self.remaining_time,
+                   remaining_time=self._remaining_time,
                    queued_time=self.queued_time,
-                   waiting_time=self.waiting_time,
+                   waiting_time=self._waiting_time,
                    wall_time=self.wall_time)
 
         copy.gave_position = self.gave_position
         copy.speedup = self.speedup
 
+        copy.clock = self.clock
+        copy.progress_time = self.progress_time
+        copy.finish_time = self.finish_time
+        copy.waiting_since = self.waiting_since
+        copy.load_index = self.load_index
+
         return copy
 
 
 class EmptyJob(Job):
 
+    __slots__ = ()
+
     def __init__(self, job: Job):
         Job.__init__(self, None, job.job_id, job.job_name, job.num_of_processes, 
                      job.binded_cores, -1, -1, None, None, None, None,)
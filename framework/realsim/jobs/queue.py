@@ -0,0 +1,156 @@
+"""
+The waiting queue of a cluster; an insertion-ordered collection of jobs with
+constant time membership tests and removals
+"""
+
+from heapq import merge
+from typing import Iterable, Iterator
+
+from .jobs import Job
+
+
+class WaitingQueue:
+    """Jobs ordered by the time they entered the queue and indexed by their job
+    id. The queue behaves like a list of jobs for the schedulers; it can be
+    iterated, indexed, sliced and compared with lists, while `remove` and `in`
+    do not scan the jobs. Only the first job is indexed in constant time; any
+    other index or slice copies the jobs to a list, so the queue should be
+    iterated instead.
+
+    Observers are notified of every job that enters or leaves the queue
+    through their `job_added` and `job_removed` methods, so that indices over
+    the waiting jobs can be kept up to date without scanning the queue.
+    """
+
+    __slots__ = ("jobs", "version", "entries", "counter", "observers")
+
+    def __init__(self, jobs: Iterable[Job] = ()):
+        # job id --> job; dictionaries keep the order of insertion
+        self.jobs: dict[int, Job] = dict()
+        # Increased every time the contents of the queue change
+        self.version: int = 0
+        # job id --> number of the job's entry in the queue; restores the
+        # position of jobs that are put back
+        self.entries: dict[int, int] = dict()
+        self.counter: int = 0
+        # Indices notified of the jobs that enter or leave the queue
+        self.observers: list = list()
+        for job in jobs:
+            self.append(job)
+
+    def __iter__(self) -> Iterator[Job]:
+        return iter(self.jobs.values())
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def __bool__(self) -> bool:
+        return self.jobs != {}
+
+    def __contains__(self, job) -> bool:
+        if not isinstance(job, Job):
+            return False
+        return job.job_id in self.jobs
+
+    def __getitem__(self, index):
+        # The head of the queue is the only position a dictionary reaches
+        # without visiting the jobs before it
+        if index == 0 and self.jobs != {}:
+            return next(iter(self.jobs.values()))
+        return list(self.jobs.values())[index]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, (WaitingQueue, list)):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        return all(job == other_job for job, other_job in zip(self, other))
+
+    def __repr__(self) -> str:
+        return repr(list(self.jobs.values()))
+
+    def append(self, job: Job) -> None:
+        """Add a job at the end of the queue
+        """
+        if job.job_id in self.jobs:
+            raise ValueError(f"Job {job.job_id} is already in the waiting queue")
+        self.jobs[job.job_id] = job
+        self.entries[job.job_id] = self.counter
+        self.counter += 1
+        self.version += 1
+        for observer in self.observers:
+            observer.job_added(job)
+
+    def extend(self, jobs: Iterable[Job]) -> None:
+        for job in jobs:
+            self.append(job)
+
+    def remove(self, job: Job) -> None:
+        """Remove a job, or a copy of it, from the queue
+        """
+        try:
+            # The job inside the queue; `job` may be a copy of it
+            job = self.jobs.pop(job.job_id)
+        except KeyError:
+            raise ValueError(f"Job {job.job_id} is not in the waiting queue")
+        del self.entries[job.job_id]
+        self.version += 1
+        for observer in self.observers:
+            observer.job_removed(job)
+
+    def entry(self, job: Job) -> int:
+        """Return the number of the job's entry in the queue
+        """
+        return self.entries[job.job_id]
+
+    def restore(self, removed: list[tuple[Job, int]]) -> None:
+        """Put back removed jobs at the positions of their entries
+        """
+        if removed == []:
+            return
+
+        entries = self.entries
+        for job, entry in removed:
+            if job.job_id in self.jobs:
+                raise ValueError(f"Job {job.job_id} is already in the waiting queue")
+            entries[job.job_id] = entry
+
+        # The jobs in the queue are already in the order of their entries, so
+        # only the restored jobs are sorted and then merged with them
+        restored = sorted((job for job, _ in removed),
+                          key=lambda job: entries[job.job_id])
+        last = next(reversed(self.jobs), None)
+
+        if last is not None and entries[last] > entries[restored[0].job_id]:
+            self.jobs = {job.job_id: job
+                         for job in merge(self.jobs.values(), restored,
+                                          key=lambda job: entries[job.job_id])}
+        else:
+            # The restored jobs entered after every job in the queue
+            for job in restored:
+                self.jobs[job.job_id] = job
+
+        for job in restored:
+            for observer in self.observers:
+                observer.job_added(job)
+
+        self.version += 1
+
+    def observe(self, observer) -> None:
+        """Notify `observer` of the jobs that enter or leave the queue,
+        starting with the jobs already inside it. An observer replaces any
+        previous observer of the same class.
+        """
+        self.observers = [other for other in self.observers
+                          if type(other) is not type(observer)]
+        self.observers.append(observer)
+        for job in self.jobs.values():
+            observer.job_added(job)
+
+    def clear(self) -> None:
+        for observer in self.observers:
+            for job in self.jobs.values():
+                observer.job_removed(job)
+        self.jobs.clear()
+        self.entries.clear()
+        self.version += 1
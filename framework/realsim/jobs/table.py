@@ -0,0 +1,255 @@
+"""
+Struct-of-arrays storage of the state of the jobs of a cluster. The columns
+that change during the simulation are kept in NumPy arrays so that a cluster
+can query all of its jobs at once; the jobs become views over a row of the
+table.
+"""
+
+from numpy import empty, full, inf, nan
+
+from .jobs import Job
+
+
+# States of a job inside the table
+PRELOADED = 0
+WAITING = 1
+EXECUTING = 2
+FINISHED = 3
+
+
+class JobTable:
+    """Parallel arrays with one row per job. Rows are appended in the order
+    the jobs are added to the table and never removed. Optional values of a
+    job (e.g. the progress time of a job that has not started) are stored as
+    NaN.
+    """
+
+    # Columns of floating point values
+    FLOAT_COLUMNS = ("remaining_time", "progress_time", "finish_time",
+                     "speedup", "queued_time", "waiting_time",
+                     "waiting_since")
+
+    # Columns of integer values
+    INT_COLUMNS = ("job_id", "state")
+
+    # Index of the rows of the executing jobs
+    INDEX_COLUMNS = ("running", "position")
+
+    def __init__(self, capacity: int = 1024):
+        # Number of rows in use
+        self.size: int = 0
+        # Job id --> row of the job
+        self.rows: dict[int, int] = dict()
+
+        self.remaining_time = empty(capacity)
+        self.progress_time = empty(capacity)
+        self.finish_time = empty(capacity)
+        self.speedup = empty(capacity)
+        self.queued_time = empty(capacity)
+        self.waiting_time = empty(capacity)
+        self.waiting_since = empty(capacity)
+
+        self.job_id = empty(capacity, dtype=int)
+        self.state = full(capacity, PRELOADED, dtype=int)
+
+        # The rows of the executing jobs are packed at the start of `running`
+        # and `position` is the index of an executing row inside it, so the
+        # queries over the executing jobs do not scan the rest of the table
+        self.num_running: int = 0
+        self.running = empty(capacity, dtype=int)
+        self.position = empty(capacity, dtype=int)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getstate__(self):
+        # Store only the rows in use
+        state = dict(self.__dict__)
+        for column in self.FLOAT_COLUMNS + self.INT_COLUMNS + self.INDEX_COLUMNS:
+            state[column] = state[column][:self.size].copy()
+        return state
+
+    def _grow(self, capacity: int) -> None:
+        """Reallocate every column with at least `capacity` rows
+        """
+        size = max(1, len(self.job_id))
+        while size < capacity:
+            size *= 2
+
+        for column in self.FLOAT_COLUMNS + self.INT_COLUMNS + self.INDEX_COLUMNS:
+            old = getattr(self, column)
+            new = empty(size, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, column, new)
+
+    def view(self, job: Job) -> 'TableJob':
+        """Append a row with the state of `job` and return a view of the job
+        over the new row
+        """
+        if self.size == len(self.job_id):
+            self._grow(self.size + 1)
+
+        row = self.size
+        self.size += 1
+
+        self.rows[job.job_id] = row
+        self.job_id[row] = job.job_id
+        self.state[row] = PRELOADED
+        self.remaining_time[row] = job._remaining_time
+        self.speedup[row] = job.speedup
+        self.queued_time[row] = job.queued_time
+        self.waiting_time[row] = job._waiting_time
+        self.progress_time[row] = nan if job.progress_time is None else job.progress_time
+        self.finish_time[row] = nan if job.finish_time is None else job.finish_time
+        self.waiting_since[row] = nan if job.waiting_since is None else job.waiting_since
+
+        view = TableJob.__new__(TableJob)
+        view.table = self
+        view.row = row
+        view.copy_attributes(job)
+
+        return view
+
+    def start(self, row: int) -> None:
+        """Mark as executing the job of a row
+        """
+        self.state[row] = EXECUTING
+        self.position[row] = self.num_running
+        self.running[self.num_running] = row
+        self.num_running += 1
+
+    def next_finish(self) -> float:
+        """Return the earliest finish time of the executing jobs or infinity
+        if no job is executing
+        """
+        if self.num_running == 0:
+            return inf
+        return float(self.finish_time[self.running[:self.num_running]].min())
+
+    def due(self, time: float) -> list[int]:
+        """Return the ids of the executing jobs whose finish time is up to and
+        including `time`
+        """
+        running = self.running[:self.num_running]
+        rows = running[self.finish_time[running] <= time]
+        return self.job_id[rows].tolist()
+
+    def finish(self, job_ids: set[int]) -> None:
+        """Mark as finished the executing jobs with the given ids
+        """
+        running = self.running
+        position = self.position
+
+        for job_id in job_ids:
+            row = self.rows[job_id]
+            self.state[row] = FINISHED
+
+            # Move the last executing row to the place of the finished one
+            self.num_running -= 1
+            last = running[self.num_running]
+            running[position[row]] = last
+            position[last] = position[row]
+
+
+def _column(name: str, optional: bool = False):
+    """Property of TableJob that reads and writes a column of the table
+    """
+
+    # Optional values are missing if NaN in a column of floating point values
+    # or negative in a column of integer values
+    integer = name in JobTable.INT_COLUMNS
+
+    def get(self):
+        value = getattr(self.table, name)[self.row].item()
+        if optional and (value < 0 if integer else value != value):
+            return None
+        return value
+
+    def set(self, value):
+        if optional and value is None:
+            value = -1 if integer else nan
+        getattr(self.table, name)[self.row] = value
+
+    return property(get, set)
+
+
+class TableJob(Job):
+    """A job whose mutable state lives in a row of a JobTable. The rest of the
+    attributes, along with the binded cores that only the schedulers read, are
+    stored in the job as usual. Copies of a view are views of the same row, so
+    all the copies of a job share the state inside the table.
+    """
+
+    __slots__ = ("table", "row")
+
+    # Attributes of Job backed by the table
+    _remaining_time = _column("remaining_time")
+    progress_time = _column("progress_time", optional=True)
+    finish_time = _column("finish_time", optional=True)
+    speedup = _column("speedup")
+    queued_time = _column("queued_time")
+    _waiting_time = _column("waiting_time")
+    waiting_since = _column("waiting_since", optional=True)
+    state = _column("state")
+
+    def copy_attributes(self, job: Job) -> None:
+        """Copy the attributes of `job` that are not stored in the table
+        """
+        self.load = job.load
+        self.job_id = job.job_id
+        self.job_name = job.job_name
+        self.num_of_processes = job.num_of_processes
+        self.wall_time = job.wall_time
+        self.gave_position = job.gave_position
+        self.half_node_cores = job.half_node_cores
+        self.full_node_cores = job.full_node_cores
+        self.binded_cores = job.binded_cores
+        self.clock = job.clock
+        self.load_index = job.load_index
+
+    def submit(self, clock) -> None:
+        Job.submit(self, clock)
+        self.state = WAITING
+
+    def start(self, clock) -> None:
+        Job.start(self, clock)
+        self.table.start(self.row)
+
+    def __reduce__(self):
+        # The attributes backed by the table must not be pickled as slots of
+        # the job; they are restored along with the table
+        return (_restore_view, (self.table, self.row, self.load, self.job_id,
+                                self.job_name, self.num_of_processes,
+                                self.wall_time, self.gave_position,
+                                self.half_node_cores, self.full_node_cores,
+                                self.clock, self.load_index,
+                                self.binded_cores))
+
+    def deepcopy(self):
+        """Return a new view of the same row
+        """
+        copy = TableJob.__new__(TableJob)
+        copy.table = self.table
+        copy.row = self.row
+        copy.copy_attributes(self)
+        return copy
+
+
+def _restore_view(table, row, load, job_id, job_name, num_of_processes,
+                  wall_time, gave_position, half_node_cores, full_node_cores,
+                  clock, load_index=None, binded_cores=None) -> TableJob:
+    view = TableJob.__new__(TableJob)
+    view.table = table
+    view.row = row
+    view.load = load
+    view.job_id = job_id
+    view.job_name = job_name
+    view.num_of_processes = num_of_processes
+    view.wall_time = wall_time
+    view.gave_position = gave_position
+    view.half_node_cores = half_node_cores
+    view.full_node_cores = full_node_cores
+    view.binded_cores = binded_cores
+    view.clock = clock
+    view.load_index = load_index
+    return view
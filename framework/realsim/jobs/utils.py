@@ -4,9 +4,11 @@ containers
 """
 
 from .jobs import Job, EmptyJob
+from .xunit import ExecutionUnit
+from .queue import WaitingQueue
 
 
-def deepcopy_list(jobs_list: list[Job] | list[list[Job]]):
+def deepcopy_list(jobs_list: list[Job] | list[list[Job]] | list[ExecutionUnit] | WaitingQueue):
     """
     Create and return a new list of jobs or lists of jobs.
     This function tries to fit all the oddities found in the simulation code
@@ -38,8 +40,12 @@ def deepcopy_list(jobs_list: list[Job] | list[list[Job]]):
             
             )))
 
+    # If the list is composed of execution units
+    elif isinstance(jobs_list[0], ExecutionUnit):
+        new_list = list(map(lambda unit: unit.deepcopy(), jobs_list))
+
     else:
-        raise Exception("The type of elements is neither Job nor List[Job]")
+        raise Exception("The type of elements is neither Job, List[Job] nor ExecutionUnit")
 
     # If everything turns out okay then return the new list
     return new_list
@@ -0,0 +1,141 @@
+"""
+Execution units; the groups of jobs that share the same set of nodes inside
+the execution list of a cluster
+"""
+
+from .jobs import Job
+
+
+class ExecutionUnit:
+    """An execution unit binds a set of nodes to one or more jobs.
+
+    - compact: a single job using all the cores of its nodes
+
+    - co-located: the head job is the job with the most binded cores and it
+      occupies half the cores of every node of the unit; the co-jobs share
+      the other half. The cores of the other half that no co-job uses are the
+      free cores of the unit.
+
+    The occupancy of the unit is updated whenever a job is added or finishes,
+    so no empty jobs are needed to represent the unused space.
+
+    A unit is dirty when its members changed since the cluster last synced
+    the speedups and completion times of its jobs. Only dirty units are
+    visited after a deployment, so whoever changes the speedup of a job
+    without adding or finishing jobs should mark its unit as dirty.
+    """
+
+    __slots__ = ("head", "cojobs", "binded_cores", "free_cores", "running",
+                 "finished", "compact", "nodes", "dirty")
+
+    def __init__(self, head: Job, compact: bool = False):
+        # The job with the most binded cores
+        self.head: Job = head
+        # The jobs co-executing with the head job
+        self.cojobs: list[Job] = list()
+        # Binded cores of the head job; the unit occupies twice as many cores
+        # unless it is compact
+        self.binded_cores: int = head.binded_cores
+        # Cores of the co-jobs' half that are not used
+        self.free_cores: int = 0 if compact else head.binded_cores
+        # Number of jobs executing and finished inside the unit
+        self.running: int = 1
+        self.finished: int = 0
+        self.compact: bool = compact
+        # Indices of the nodes of the cluster allocated to the unit
+        self.nodes = None
+        # A new unit has jobs that the cluster has not seen yet
+        self.dirty: bool = True
+
+    def __iter__(self):
+        """Iterate over the executing jobs of the unit; head job first
+        """
+        if self.running == 0:
+            return
+        yield self.head
+        yield from self.cojobs
+
+    def __repr__(self) -> str:
+        if self.compact:
+            return f"[{self.head}]"
+        return f"[{self.head}, {', '.join(map(repr, self.cojobs))} | free: {self.free_cores}]"
+
+    def is_filled(self) -> bool:
+        """True if every binded core of the unit is used by an executing job
+        """
+        return self.running > 0 and (self.compact or self.free_cores == 0)
+
+    def is_nonfilled(self) -> bool:
+        """True if the unit is co-located, has executing jobs and free cores
+        """
+        return self.running > 0 and not self.compact and self.free_cores > 0
+
+    def occupied_cores(self) -> int:
+        """Number of cores of the cluster occupied by the unit
+        """
+        return self.binded_cores if self.compact else 2 * self.binded_cores
+
+    def add(self, job: Job) -> None:
+        """Add a co-job that fits in the free cores of the unit
+        """
+        self.cojobs.append(job)
+        self.free_cores -= job.binded_cores
+        self.running += 1
+        self.dirty = True
+
+    def finish(self, job_ids: set[int]) -> list[Job]:
+        """Remove the jobs that finished from the unit and return them. If the
+        head job finished then the largest co-job becomes the head job and
+        takes over its binded cores.
+        """
+        finished: list[Job] = list()
+        cojobs: list[Job] = list()
+
+        for job in self.cojobs:
+            if job.job_id in job_ids:
+                finished.append(job)
+                self.free_cores += job.binded_cores
+            else:
+                cojobs.append(job)
+
+        if self.head.job_id in job_ids:
+            finished.insert(0, self.head)
+
+            # Elect the co-job with the most binded cores as the new head;
+            # on ties the first one in order
+            jobs: list[Job] = list()
+            max_binded_cores = -1
+            for job in cojobs:
+                if job.binded_cores > max_binded_cores:
+                    jobs.insert(0, job)
+                    max_binded_cores = job.binded_cores
+                else:
+                    jobs.append(job)
+
+            if jobs != []:
+                self.head = jobs[0]
+                self.free_cores += self.head.binded_cores
+                self.head.binded_cores = self.binded_cores
+                cojobs = jobs[1:]
+
+        self.cojobs = cojobs
+        self.running -= len(finished)
+        self.finished += len(finished)
+
+        if finished:
+            self.dirty = True
+
+        return finished
+
+    def deepcopy(self) -> 'ExecutionUnit':
+        """Return a new instance of ExecutionUnit with copies of its jobs
+        """
+        copy = ExecutionUnit(self.head.deepcopy(), self.compact)
+        copy.cojobs = [job.deepcopy() for job in self.cojobs]
+        copy.binded_cores = self.binded_cores
+        copy.free_cores = self.free_cores
+        copy.running = self.running
+        copy.finished = self.finished
+        copy.nodes = None if self.nodes is None else self.nodes.copy()
+        copy.dirty = self.dirty
+        return copy
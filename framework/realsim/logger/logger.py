@@ -10,7 +10,7 @@ sys.path.append(os.path.abspath(
 
 #if TYPE_CHECKING:
 #    from realsim.cluster import ClusterV2
-from realsim.jobs.jobs import EmptyJob, Job
+from realsim.jobs.jobs import Job
 import plotly.graph_objects as go
 import plotly.express.colors as colors
 
@@ -41,6 +41,7 @@ class Logger(object):
         self.cluster_events["deploying:compact"] = 0
         self.cluster_events["deploying:success"] = 0
         self.cluster_events["deploying:failed"] = 0
+        self.cluster_events["deploying:skipped"] = 0
 
         # Events #
         # Job events
@@ -73,59 +74,48 @@ class Logger(object):
               in time with the specific speedup
         """
 
-        self.cluster_events["checkpoints"].add(
-                self.cluster.makespan
-        )
+        if not self.recording:
+            return
 
-        # Record the number of used cores at this checkpoint
-        self.cluster_events["used cores"].append(
-                self.cluster.total_cores - self.cluster.free_cores
-        )
+        self.evt_checkpoint()
 
         for xunit in self.cluster.execution_list:
 
-            if len(xunit) == 1 and type(xunit[0]) != EmptyJob:
+            if xunit.running == 0:
+                continue
+
+            if xunit.compact:
 
-                job_key = f"{xunit[0].job_id}:{xunit[0].job_name}"
+                job_key = f"{xunit.head.job_id}:{xunit.head.job_name}"
 
                 # Get the starting time of job for each checkpoint
                 self.job_events[job_key]["trace"].append(
                         ["compact", self.cluster.makespan, None]
                 )
 
-                self.job_events[job_key]["speedups"].append(xunit[0].speedup)
+                self.job_events[job_key]["speedups"].append(xunit.head.speedup)
 
                 # Get compact cores usage
                 self.job_events[job_key]["cores"].update({
-                    "compact": xunit[0].binded_cores
+                    "compact": xunit.head.binded_cores
                 })
 
                 self.job_events[job_key]["remaining time"].append(
-                        xunit[0].remaining_time
+                        xunit.head.remaining_time
                 )
 
-            elif len(xunit) > 1:
-                # Find if every job has finished
-                empty = True
-                for job in xunit:
-                    if type(job) != EmptyJob:
-                        empty = False
-                        break
-                
-                if empty:
-                    continue
+            else:
 
-                head_key = f"{xunit[0].job_id}:{xunit[0].job_name}"
+                head_key = f"{xunit.head.job_id}:{xunit.head.job_name}"
 
                 # Get tail key
                 tail_key = "spread"
-                tail = [job for job in xunit[1:] if type(job) != EmptyJob ]
+                tail = xunit.cojobs
 
                 if tail != []:
 
                     tail_key = "|".join([
                         f"{job.job_id}:{job.job_name}" for job in tail
-                        if type(job) != EmptyJob
                     ])
 
                     for job in tail:
@@ -152,22 +142,66 @@ class Logger(object):
                         [tail_key, self.cluster.makespan, None]
                 )
                 
-                self.job_events[head_key]["speedups"].append(xunit[0].speedup)
+                self.job_events[head_key]["speedups"].append(xunit.head.speedup)
 
                 self.job_events[head_key]["cores"].update({
-                    tail_key: xunit[0].binded_cores
+                    tail_key: xunit.head.binded_cores
                 })
 
                 self.job_events[head_key]["remaining time"].append(
-                        xunit[0].remaining_time
+                        xunit.head.remaining_time
                 )
-            else:
-                pass
+
+    def evt_checkpoint(self):
+        """Record the current point in time as a checkpoint along with the
+        number of used cores
+        """
+
+        self.cluster_events["checkpoints"].add(
+                self.cluster.makespan
+        )
+
+        # Record the number of used cores at this checkpoint
+        self.cluster_events["used cores"].append(
+                self.cluster.total_cores - self.cluster.free_cores
+        )
+
+    def evt_compact_jobs_executing(self, jobs: list[Job]):
+        """Record the same events as `evt_jobs_executing` for `jobs`, which
+        execute alone in compact execution units. Used by engines that do not
+        keep the execution list.
+        """
+
+        if not self.recording:
+            return
+
+        self.evt_checkpoint()
+
+        for job in jobs:
+
+            job_key = f"{job.job_id}:{job.job_name}"
+
+            self.job_events[job_key]["trace"].append(
+                    ["compact", self.cluster.makespan, None]
+            )
+
+            self.job_events[job_key]["speedups"].append(job.speedup)
+
+            self.job_events[job_key]["cores"].update({
+                "compact": job.binded_cores
+            })
+
+            self.job_events[job_key]["remaining time"].append(
+                    job.remaining_time
+            )
 
     def evt_job_finishes(self, job: Job):
         """Record time when job finished
         """
 
+        if not self.recording:
+            return
+
         job_key = f"{job.job_id}:{job.job_name}"
 
         # Set ending time in last trace
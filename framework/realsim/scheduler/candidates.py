@@ -0,0 +1,111 @@
+"""
+Index of the co-scheduling candidates among the waiting jobs. Whether two jobs
+may be co-scheduled depends only on their loads, so the compatible co-loads of
+every load and the average speedup of every pair are computed once from the
+heatmap. The waiting jobs are bucketed by load and by the number of cores they
+need on half the nodes, so the candidates that fit in a number of cores are
+found by visiting the compatible loads and bisecting their sizes instead of
+scanning the waiting queue.
+"""
+
+import os
+import sys
+from bisect import bisect_right, insort
+from typing import Optional
+
+sys.path.append(os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../../')
+))
+
+from realsim.jobs import Job
+from realsim.scheduler.heatmap import Heatmap
+
+from numpy import flatnonzero
+
+
+class CandidateIndex:
+    """Waiting jobs bucketed by load and size. Two jobs are compatible if both
+    of their speedups are known and their average is above `threshold`.
+
+    The index observes the waiting queue of the cluster, which keeps it up to
+    date with the jobs entering and leaving the queue.
+    """
+
+    def __init__(self, heatmap: Heatmap, threshold: float):
+        self.threshold = threshold
+        # Load index --> size --> job id --> waiting job
+        self.buckets: list[dict[int, dict[int, Job]]] = list()
+        # Load index --> sorted sizes of the non-empty buckets
+        self.sizes: list[list[int]] = list()
+        self.update(heatmap)
+
+    def update(self, heatmap: Heatmap) -> None:
+        """Compute the compatible loads again after the heatmap changed. The
+        loads keep their indices and the new loads have no waiting jobs.
+        """
+        known = heatmap.mask & heatmap.mask.T
+        average = (heatmap.values + heatmap.values.T) / 2
+        compatible = known & (average > self.threshold)
+
+        # Load index --> indices of the compatible loads
+        self.partners: list[list[int]] = [flatnonzero(row).tolist() for row in compatible]
+        # Load index --> compatible co-load index --> True
+        self.compatible_loads: list[set[int]] = [set(partners) for partners in self.partners]
+        # Average speedup of every pair of loads as lists; reading a single
+        # value from a list is much faster than from an array
+        self.averages: list[list[float]] = average.tolist()
+
+        for _ in range(len(self.buckets), len(self.partners)):
+            self.buckets.append(dict())
+            self.sizes.append(list())
+
+    def job_added(self, job: Job) -> None:
+        """A job entered the waiting queue
+        """
+        buckets = self.buckets[job.load_index]
+        size = job.half_node_cores
+        if size not in buckets:
+            buckets[size] = dict()
+            insort(self.sizes[job.load_index], size)
+        buckets[size][job.job_id] = job
+
+    def job_removed(self, job: Job) -> None:
+        """A job left the waiting queue
+        """
+        buckets = self.buckets[job.load_index]
+        size = job.half_node_cores
+        bucket = buckets[size]
+        del bucket[job.job_id]
+        if bucket == {}:
+            del buckets[size]
+            self.sizes[job.load_index].remove(size)
+
+    def compatible(self, job: Job, co_job: Job) -> bool:
+        return co_job.load_index in self.compatible_loads[job.load_index]
+
+    def average(self, job: Job, co_job: Job) -> float:
+        """Return the average speedup of two jobs when co-scheduled
+        """
+        return self.averages[job.load_index][co_job.load_index]
+
+    def fitting(self,
+                job: Job,
+                max_cores: int,
+                exclude: Optional[int] = None) -> list[Job]:
+        """Return the waiting jobs compatible with `job` that need at most
+        `max_cores` cores on half the nodes, without the job with id `exclude`.
+        The jobs are in no particular order.
+        """
+        candidates: list[Job] = list()
+        for partner in self.partners[job.load_index]:
+            sizes = self.sizes[partner]
+            if sizes == []:
+                continue
+            buckets = self.buckets[partner]
+            for size in sizes[:bisect_right(sizes, max_cores)]:
+                candidates.extend(buckets[size].values())
+
+        if exclude is not None:
+            candidates = [co_job for co_job in candidates if co_job.job_id != exclude]
+
+        return candidates
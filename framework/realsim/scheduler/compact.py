@@ -1,4 +1,5 @@
 from .scheduler import Scheduler
+from realsim.jobs import ExecutionUnit
 from realsim.jobs.utils import deepcopy_list
 
 
@@ -14,6 +15,15 @@ class CompactScheduler(Scheduler):
     def setup(self):
         pass
 
+    def scheduling_signature(self) -> tuple:
+        """A deployment fails only if no waiting job fits inside the free
+        cores, which depends only on the free cores and on the smallest
+        waiting job
+        """
+        full_node_cores = self.cluster.full_node_cores
+        return (self.cluster.free_cores,
+                min(map(full_node_cores, self.cluster.waiting_queue), default=0))
+
     def deploy(self) -> bool:
 
         # Did we deploy any job?
@@ -28,8 +38,9 @@ class CompactScheduler(Scheduler):
             if self.cluster.full_node_cores(job) <= self.cluster.free_cores:
                 self.cluster.waiting_queue.remove(job)
                 job.binded_cores = self.cluster.full_node_cores(job)
-                self.cluster.execution_list.append([job])
-                self.cluster.free_cores -= job.binded_cores
+                xunit = ExecutionUnit(job, compact=True)
+                self.cluster.execution_list.append(xunit)
+                self.cluster.allocate(xunit)
                 deployed = True
 
         return deployed
@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 
 import os
 import sys
+import math
 from typing import Optional
 
 sys.path.append(os.path.abspath(
@@ -14,15 +15,12 @@ sys.path.append(os.path.abspath(
 
 from api.loader import Load
 from realsim.scheduler.scheduler import Scheduler
-from realsim.jobs import Job, EmptyJob
+from realsim.scheduler.heatmap import Heatmap
+from realsim.scheduler.candidates import CandidateIndex
+from realsim.scheduler.matching import MAX_EXACT_LIMIT, max_weight_pairs
+from realsim.jobs import Job, ExecutionUnit
 from realsim.jobs.utils import deepcopy_list
-from numpy import average as avg
-from typing import Protocol
-
-
-class ScikitModel(Protocol):
-    def predict(self, X):
-        pass
+from realsim.scheduler.inference import ScikitModel, predict_speedups
 
 
 class Coscheduler(Scheduler, ABC):
@@ -43,84 +41,96 @@ class Coscheduler(Scheduler, ABC):
         self.threshold = threshold
         self.system_utilization = system_utilization
         self.engine = engine
-        self.heatmap: dict[str, dict] = dict()
+        # Directory of the cache of the engine's predictions; no cache if not
+        # set
+        self.engine_cache: Optional[str] = None
+        self.heatmap: Heatmap = Heatmap([])
+        self.candidates: CandidateIndex = CandidateIndex(self.heatmap, threshold)
+        # How waiting jobs are paired; "greedy" or "matching"
+        self.pairing: str = "greedy"
+        # Largest number of jobs whose matching is exact
+        self.exact_limit: int = 10
         Scheduler.__init__(self)
 
     def setup(self):
-        """Create the heatmap for the jobs in the waiting queue
+        """Create the heatmap for the loads of the preloaded jobs and the index
+        of the co-scheduling candidates among the waiting jobs
         """
 
-        # Initialize the heatmap
-        for job in self.cluster.preloaded_queue:
-            self.heatmap[job.job_name] = {}
-
-        # Get a copy of the preloaded queue
-        preloaded_queue = deepcopy_list(self.cluster.preloaded_queue)
-
-        while preloaded_queue != []:
-
-            job: Job = self.pop(preloaded_queue)
-
-            load: Optional[Load] = job.load
-
-            if load is None:
-                raise RuntimeError("A job with an empty load was found inside the waiting queue at the startup stage")
-
-            for co_job in preloaded_queue:
-
-                co_load: Optional[Load] = co_job.load
+        self.heatmap = Heatmap.for_jobs(self.cluster.preloaded_queue)
+        self.fill_heatmap()
 
-                if co_load is None:
-                    raise RuntimeError("A job with an empty load was found inside the waiting queue at the startup stage")
+        # The candidates are kept up to date with the waiting queue
+        self.candidates = CandidateIndex(self.heatmap, self.threshold)
+        self.cluster.waiting_queue.observe(self.candidates)
 
-                if self.engine is not None:
-                    # If an inference engine is provided then predict the
-                    # speedup for both load and co-load when co-scheduled
-
-                    # Get speedup for load when co-scheduled with co-load
-                    self.heatmap[load.full_load_name].update({
-                            co_load.full_load_name: self.engine.predict(
-                                load.get_tag(), co_load.get_tag()
-                            )
-                    })
-
-                    # Get speedup for co-load when co-scheduled with load
-                    self.heatmap[co_load.full_load_name].update({
-                            load.full_load_name: self.engine.predict(
-                                co_load.get_tag(), load.get_tag()
-                            )
-                    })
-
-                else:
-                    # If we do not have an inference engine, then use the stored
-                    # knowledge inside each load to get their speedups
-                    # and if we do not have knowledge of their co-execution then
-                    # submit a None value inside the heatmap
-
-                    # Get speedup for load when co-scheduled with co-load
-                    self.heatmap[load.full_load_name].update({
-
-                            co_load.full_load_name:
-
-                            load.get_median_speedup(co_load.full_load_name) 
-                            if co_load.full_load_name in load.coloads
-                            else None
+    def fill_heatmap(self, indices: Optional[list[int]] = None) -> None:
+        """Set the speedups of the heatmap or, if `indices` is given, of the
+        pairs with one of these loads
+        """
+        if self.engine is not None:
+            # If an inference engine is provided then predict the speedup of
+            # every load when co-scheduled with every co-load in one batch;
+            # the cache of the engine keeps the known pairs
+            tags = [load.get_tag() for load in self.heatmap.loads]
+            self.heatmap.fill_matrix(
+                    predict_speedups(self.engine, tags, self.engine_cache)
+            )
+
+        else:
+            # If we do not have an inference engine, then use the stored
+            # knowledge inside each load to get their speedups and if we do not
+            # have knowledge of their co-execution then leave the speedup
+            # unknown inside the heatmap
+            def speedup(load: Load, co_load: Load) -> Optional[float]:
+                if co_load.full_load_name in load.coloads:
+                    return load.get_median_speedup(co_load.full_load_name)
+                return None
+
+            self.heatmap.fill(speedup, indices)
+
+    def admit(self, job: Job) -> None:
+        """Index the load of a job that was not preloaded when the heatmap
+        was built; an unseen load grows the heatmap
+        """
+        indices = self.heatmap.admit(job)
+        if indices != []:
+            self.fill_heatmap(indices)
+            self.heatmap_changed()
+
+    def heatmap_changed(self):
+        """Bring the indices over the loads up to date after the heatmap
+        changed
+        """
+        self.candidates.update(self.heatmap)
 
-                    })
+    def set_engine_cache(self, path: Optional[str]) -> None:
+        """Keep the predictions of the engine in a cache inside the directory
+        `path`, so that simulations with the same engine and loads reuse them.
+        Set `path` to None to disable the cache.
+        """
+        self.engine_cache = path
 
-                    # Get speedup for co-load when co-scheduled with load
-                    self.heatmap[co_load.full_load_name].update({
+    def set_pairing(self, pairing: str, exact_limit: Optional[int] = None) -> None:
+        """Choose how waiting jobs are paired with each other
 
-                            load.full_load_name:
+        - greedy: every waiting job in order takes its best co-jobs
+        - matching: the pairs of a maximum-weight matching of the waiting
+          jobs; exact if at most `exact_limit` jobs can be paired, which
+          may not be more than MAX_EXACT_LIMIT
+        """
+        if pairing not in ("greedy", "matching"):
+            raise RuntimeError(f"Unknown pairing of waiting jobs: {pairing}")
 
-                            co_load.get_median_speedup(load.full_load_name) 
-                            if load.full_load_name in co_load.coloads
-                            else None
+        if exact_limit is not None and not (0 <= exact_limit <= MAX_EXACT_LIMIT):
+            raise RuntimeError(f"The exact matching is limited to {MAX_EXACT_LIMIT} jobs: {exact_limit}")
 
-                    })
+        self.pairing = pairing
+        if exact_limit is not None:
+            self.exact_limit = exact_limit
 
     @abstractmethod
-    def xunits_order(self, xunit: list[Job]) -> float:
+    def xunits_order(self, xunit: ExecutionUnit) -> float:
         pass
 
     @abstractmethod
@@ -135,7 +145,7 @@ class Coscheduler(Scheduler, ABC):
     def wjob_candidates_order(self, job: Job, co_job: Job) -> float:
         pass
 
-    def after_deployment(self, xunit: list[Job]):
+    def after_deployment(self, xunit: ExecutionUnit):
         """After deployment work to be done
         """
         pass
@@ -144,28 +154,12 @@ class Coscheduler(Scheduler, ABC):
                          largest_job: Job, 
                          empty_space: int) -> list[Job]:
 
-        # Get candidates that have a speedup and they fit inside the xunit
-        candidates = list(
-                filter(
-                    lambda job:
+        # Get the waiting jobs that fit inside the xunit and whose average
+        # speedup with the largest job is greater than the threshold
+        candidates = self.candidates.fitting(largest_job, empty_space)
 
-                    self.heatmap[largest_job.job_name][job.job_name] is not None 
-                    and
-                    job.half_node_cores <= empty_space,
-
-                    self.cluster.waiting_queue
-                )
-        )
-
-        # Filter candidates whose average speedup is greater than the threshold
-        candidates = list(filter(
-            lambda co_job: 
-            avg([
-                self.heatmap[largest_job.job_name][co_job.job_name],
-                self.heatmap[co_job.job_name][largest_job.job_name]
-                ]) > self.threshold,
-            candidates
-        ))
+        # Keep the order of the waiting queue among equal candidates
+        candidates.sort(key=self.cluster.waiting_queue.entry)
 
         # Sort candidate jobs by an ordering function
         candidates.sort(
@@ -183,74 +177,54 @@ class Coscheduler(Scheduler, ABC):
         space
         """
 
-        nonfilled_xunits = self.cluster.nonfilled_xunits()
+        # Only the units that can fit the smallest waiting job may have
+        # candidates; the waiting jobs only decrease while deploying
+        smallest = min((job.half_node_cores for job in self.cluster.waiting_queue),
+                       default=math.inf)
+
+        fitting_xunits = self.cluster.fitting_xunits(smallest)
 
-        nonfilled_xunits.sort(
+        # Only the units with possible candidates are ordered; the rest of
+        # the non-filled units are visited as they are found in the index
+        fitting_xunits.sort(
                 key=lambda unit: self.xunits_order(unit),
                 reverse=True
         )
 
-        for xunit in nonfilled_xunits:
+        nonfitting_xunits = self.cluster.nonfitting_xunits(smallest)
 
-            largest_job = xunit[0]
+        for xunit in fitting_xunits + nonfitting_xunits:
 
-            # Get the largest job's binded cores
-            max_binded_cores = largest_job.binded_cores
-
-            # Get the sum of binded cores of the smallest jobs
-            min_binded_cores = 0
-            for job in xunit[1:]:
-                if type(job) != EmptyJob:
-                    min_binded_cores += job.binded_cores
+            largest_job = xunit.head
 
             # Empty space inside the xunit
-            empty_space = max_binded_cores - min_binded_cores
+            empty_space = xunit.free_cores
 
             # Get the possible candidates for the xunit
-            candidates = self.xunit_candidates(largest_job, empty_space)
+            if empty_space >= smallest:
+                candidates = self.xunit_candidates(largest_job, empty_space)
+            else:
+                candidates = []
 
-            # If no candidate was found then check if there is only one non
-            # empty job inside the unit
+            # If no candidate was found then check if there is only one
+            # job inside the unit
             if candidates == []:
 
                 # If no job is co-executing with the largest job inside the
                 # xunit then change the execution policy to spread
-                if min_binded_cores == 0: 
+                if xunit.cojobs == []:
 
                     # Check if spread and if not change it to spread
                     if largest_job.speedup != largest_job.get_max_speedup():
                         largest_job.remaining_time *= largest_job.speedup / largest_job.get_max_speedup()
                         largest_job.speedup = largest_job.get_max_speedup()
 
-                    empty_job = EmptyJob(Job(None, 
-                                             -1, 
-                                             "empty", 
-                                             empty_space, 
-                                             empty_space,
-                                             -1,
-                                             -1,
-                                             None, 
-                                             None, 
-                                             None, 
-                                             None))
-
-                    new_xunit = [largest_job, empty_job]
-
-                    # Deployment!
-                    deploying_list.append(new_xunit)
-                    self.after_deployment(new_xunit)
-
                 else:
 
                     # If there are other jobs except the largest that are still
                     # executing then find the job that minimizes the largest's
                     # job speedup
-                    neighbors = list(filter(
-                        lambda job: type(job) != EmptyJob,
-                        xunit[1:]
-                    ))
-
-                    worst_neighbor = min(neighbors, 
+                    worst_neighbor = min(xunit.cojobs, 
                                          key=lambda job: largest_job.get_speedup(job)
                                          )
 
@@ -258,69 +232,44 @@ class Coscheduler(Scheduler, ABC):
                     if largest_job.speedup != largest_job.get_speedup(worst_neighbor):
                         largest_job.ratioed_remaining_time(worst_neighbor)
 
-                    # Deployment!
-                    deploying_list.append(xunit)
-                    self.after_deployment(xunit)
-
-                continue
+                # The speedup of the largest job may have changed
+                xunit.dirty = True
 
-            # If there are candidates then substitute the xunit with a new one
-            # that includes as much possible candidates
-
-            # Create a substitute execution unit
-            substitute_unit: list[Job] = list()
-
-            # Load the non empty jobs
-            for job in xunit:
-                if type(job) != EmptyJob:
-                    substitute_unit.append(job)
+                # Deployment!
+                deploying_list.append(xunit)
+                self.after_deployment(xunit)
 
-            # Run through fit_jobs list to fit lesser jobs 
-            # in the substitute_unit
-            rem_cores = empty_space
+                continue
 
+            # If there are candidates then fit as many of them as possible
+            # inside the free cores of the xunit
             for co_job in candidates:
 
-                if co_job.half_node_cores <= rem_cores:
+                if co_job.half_node_cores <= xunit.free_cores:
 
                     self.cluster.waiting_queue.remove(co_job)
                     co_job.binded_cores = co_job.half_node_cores
-                    co_job.ratioed_remaining_time(substitute_unit[0])
+                    co_job.ratioed_remaining_time(largest_job)
 
-                    substitute_unit.append(co_job)
-                    rem_cores -= co_job.binded_cores
+                    xunit.add(co_job)
 
             # Redefine largest job speedup
-            worst_neighbor = min(substitute_unit[1:], key=(
-                lambda co_job: substitute_unit[0].get_speedup(co_job)
+            worst_neighbor = min(xunit.cojobs, key=(
+                lambda co_job: largest_job.get_speedup(co_job)
             ))
 
-            if substitute_unit[0].speedup != substitute_unit[0].get_speedup(worst_neighbor):
-                substitute_unit[0].ratioed_remaining_time(worst_neighbor)
-            
-            # If rem_cores > 0 then there is an empty space left in the unit
-            if rem_cores > 0:
-                empty_job = EmptyJob(Job(None, 
-                                         -1,
-                                         "empty",
-                                         rem_cores,
-                                         rem_cores, 
-                                         -1,
-                                         -1,
-                                         None, 
-                                         None, 
-                                         None, 
-                                         None))
-                substitute_unit.append(empty_job)
-
-            # Remove the former unit from the execution list
+            if largest_job.speedup != largest_job.get_speedup(worst_neighbor):
+                largest_job.ratioed_remaining_time(worst_neighbor)
+
+            # Move the unit from the execution list to the end of the
+            # deploying list
             self.cluster.execution_list.remove(xunit)
             
             # Deployment!
-            deploying_list.append(substitute_unit)
+            deploying_list.append(xunit)
 
             self.deploying = True
-            self.after_deployment(substitute_unit)
+            self.after_deployment(xunit)
 
             # Write down event to logger
             self.logger.cluster_events["deploying:exec-colocation"] += 1
@@ -329,32 +278,40 @@ class Coscheduler(Scheduler, ABC):
 
     def wjob_candidates(self, 
                         job: Job, 
-                        candidates: list[Job]) -> list[Job]:
+                        candidates: Optional[list[Job]] = None) -> list[Job]:
+        """Return the co-jobs that can be paired with `job` on free nodes,
+        best first. The co-jobs are looked up among the waiting jobs, except
+        `job` itself, unless a list of `candidates` is provided.
+        """
+
+        free_cores = self.cluster.free_cores
 
-        # Filter out cojobs that can't fit into the execution list as pairs
-        candidates = list(filter(
-            lambda co_job: 
+        if candidates is None:
+            # Both jobs should fit into the free cores as a pair
+            if 2 * job.half_node_cores > free_cores:
+                return []
 
-            self.heatmap[co_job.job_name][job.job_name] is not None 
-            and
-            2 * max(
-                job.half_node_cores,
-                co_job.half_node_cores
-            ) <= self.cluster.free_cores, 
+            candidates = self.candidates.fitting(job, free_cores // 2,
+                                                 exclude=job.job_id)
 
-            candidates
-        ))
+            # Keep the order of the waiting queue among equal candidates
+            candidates.sort(key=self.cluster.waiting_queue.entry)
 
-        candidates = list(filter(
-            lambda co_job:
+        else:
+            # Filter out cojobs that can't fit into the execution list as
+            # pairs or whose average speedup is not greater than the threshold
+            candidates = list(filter(
+                lambda co_job: 
 
-            avg([
-                self.heatmap[job.job_name][co_job.job_name],
-                self.heatmap[co_job.job_name][job.job_name]
-                ]) > self.threshold,
+                self.candidates.compatible(job, co_job)
+                and
+                2 * max(
+                    job.half_node_cores,
+                    co_job.half_node_cores
+                ) <= free_cores, 
 
-            candidates
-        ))
+                candidates
+            ))
 
         # Sort `wq` by the wait_ordering function
         candidates.sort(key=lambda co_job: 
@@ -368,6 +325,10 @@ class Coscheduler(Scheduler, ABC):
         ################################
         # Colocation with waiting jobs #
         ################################
+        if self.pairing == "matching":
+            self.deploying_wait_matching(deploying_list)
+            return
+
         waiting_queue: list[Job] = deepcopy_list(self.cluster.waiting_queue)
 
         # Order waiting queue by needed cores starting with the lowest
@@ -380,18 +341,15 @@ class Coscheduler(Scheduler, ABC):
             # Get the job at the head
             job = self.pop(waiting_queue)
             
-            # Create a dummy waiting queue without `job`
-            candidates = deepcopy_list(self.cluster.waiting_queue)
-            candidates.remove(job)
-
-            candidates = self.wjob_candidates(job, candidates)
+            # The waiting jobs that can be paired with `job`
+            candidates = self.wjob_candidates(job)
 
             # If empty, no pair can be made continue to the next job
             if candidates == []:
                 continue
 
-            # If there are candidates then create a new xunit
-            xunit: list[Job] = [job]
+            # If there are candidates then collect the co-jobs of a new xunit
+            co_jobs: list[Job] = list()
             max_binded_cores = job.half_node_cores
             
             # Build execution unit
@@ -404,13 +362,13 @@ class Coscheduler(Scheduler, ABC):
                     co_job.ratioed_remaining_time(job)
                     co_job.binded_cores = co_job.half_node_cores
 
-                    xunit.append(co_job)
+                    co_jobs.append(co_job)
 
                     max_binded_cores -= co_job.binded_cores
 
             # If the other cojobs where larger
             # TODO: WARNING TEST OUT THE RATIOED REMAINING TIME
-            if len(xunit) == 1:
+            if co_jobs == []:
 
                 waiting_queue.append(job)
                 
@@ -419,30 +377,17 @@ class Coscheduler(Scheduler, ABC):
             self.cluster.waiting_queue.remove(job)
             
             # Set the speedup of the largest job
-            worst_neighbor = min(xunit[1:], key=(
+            worst_neighbor = min(co_jobs, key=(
                 lambda co_job: job.get_speedup(co_job)
             ))
 
             job.ratioed_remaining_time(worst_neighbor)
             job.binded_cores = job.half_node_cores
 
-            # If max_binded_cores is not 0 then fill the empty cores
-            # with an empty job
-            if max_binded_cores > 0:
-                empty_job = EmptyJob(
-                        Job(None, 
-                            -1, 
-                            "empty", 
-                            max_binded_cores, 
-                            max_binded_cores,
-                            -1,
-                            -1,
-                            None, 
-                            None, 
-                            None, 
-                            None))
-
-                xunit.append(empty_job)
+            # Any cores left by the co-jobs remain as free cores of the xunit
+            xunit = ExecutionUnit(job)
+            for co_job in co_jobs:
+                xunit.add(co_job)
 
             # Deployment!
             deploying_list.append(xunit)
@@ -452,7 +397,51 @@ class Coscheduler(Scheduler, ABC):
             self.after_deployment(xunit)
 
             # Cluster setup
-            self.cluster.free_cores -= 2 * job.binded_cores
+            self.cluster.allocate(xunit)
+
+            # Logger cluster events update
+            self.logger.cluster_events["deploying:wait-colocation"] += 1
+
+        return
+
+    def deploying_wait_matching(self, deploying_list):
+        """Pair the waiting jobs by a maximum-weight matching; the weight of
+        a pair is the average speedup of its jobs
+        """
+
+        pairs = max_weight_pairs(list(self.cluster.waiting_queue),
+                                 self.candidates,
+                                 self.cluster.free_cores,
+                                 self.exact_limit)
+
+        for job, co_job in pairs:
+
+            # The larger job is the head of the execution unit
+            if co_job.half_node_cores > job.half_node_cores:
+                job, co_job = co_job, job
+
+            self.cluster.waiting_queue.remove(co_job)
+            self.cluster.waiting_queue.remove(job)
+
+            co_job.ratioed_remaining_time(job)
+            co_job.binded_cores = co_job.half_node_cores
+
+            job.ratioed_remaining_time(co_job)
+            job.binded_cores = job.half_node_cores
+
+            # Any cores left by the co-job remain as free cores of the xunit
+            xunit = ExecutionUnit(job)
+            xunit.add(co_job)
+
+            # Deployment!
+            deploying_list.append(xunit)
+
+            # Scheduler setup
+            self.deploying = True
+            self.after_deployment(xunit)
+
+            # Cluster setup
+            self.cluster.allocate(xunit)
 
             # Logger cluster events update
             self.logger.cluster_events["deploying:wait-colocation"] += 1
@@ -482,14 +471,15 @@ class Coscheduler(Scheduler, ABC):
                 job.binded_cores = job.full_node_cores
 
                 # Deploy job
-                deploying_list.append([job])
+                xunit = ExecutionUnit(job, compact=True)
+                deploying_list.append(xunit)
 
                 # Cluster setup
-                self.cluster.free_cores -= job.binded_cores
+                self.cluster.allocate(xunit)
 
                 # Scheduler setup
                 self.deploying = True
-                self.after_deployment([job])
+                self.after_deployment(xunit)
 
                 # Logger cluster events update
                 self.logger.cluster_events["deploying:compact"] += 1
@@ -522,22 +512,11 @@ class Coscheduler(Scheduler, ABC):
                 job.binded_cores = job.half_node_cores
                 job.speedup = job.get_max_speedup()
 
-                # Deploying job
-                empty_space = EmptyJob(Job(None, 
-                                           -1, 
-                                           "empty",
-                                           job.binded_cores,
-                                           job.binded_cores,
-                                           -1,
-                                           -1,
-                                           None,
-                                           None,
-                                           None,
-                                           None))
-                xunit = [job, empty_space]
+                # Deploying job; the other half of the cores stays empty
+                xunit = ExecutionUnit(job)
                 deploying_list.append(xunit)
 
-                self.cluster.free_cores -= 2 * job.binded_cores
+                self.cluster.allocate(xunit)
 
                 self.deploying = True
                 self.after_deployment(xunit)
@@ -7,7 +7,7 @@ sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), "../../../../"
 )))
 
-from realsim.jobs.jobs import Job
+from realsim.jobs import ExecutionUnit
 from realsim.scheduler.coscheduler import Coscheduler
 
 
@@ -26,7 +26,7 @@ class DampenedCoscheduler(Coscheduler, ABC):
     def deploying(self):
 
         # List of jobs to deploy
-        deploy_list: list[list[Job]] = list()
+        deploy_list: list[ExecutionUnit] = list()
 
         # Co-scheduling waiting jobs with nonfilled executing units
         self.deploying_to_xunits(deploy_list)
@@ -6,11 +6,9 @@ sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), "../../../../"
 )))
 
-from realsim.jobs import Job, EmptyJob
+from realsim.jobs import Job, ExecutionUnit
 from .ranks import RanksCoscheduler, ScikitModel
 
-from numpy import average as avg
-
 
 class BalancingRanksCoscheduler(RanksCoscheduler):
 
@@ -39,8 +37,8 @@ class BalancingRanksCoscheduler(RanksCoscheduler):
                                   engine=engine,
                                   ranks_threshold=ranks_threshold)
 
-    def xunits_order(self, xunit: list[Job]):
-        return float(xunit[0].binded_cores)
+    def xunits_order(self, xunit: ExecutionUnit):
+        return float(xunit.head.binded_cores)
 
     def xunits_candidates_order(self, largest_job: Job, job: Job):
 
@@ -60,10 +58,7 @@ class BalancingRanksCoscheduler(RanksCoscheduler):
                 (1 - cores_r) * self.fragmentation
 
         # Average speedup between xunit's largest job and the job candidate
-        avg_speedup = avg([
-            self.heatmap[job.job_name][largest_job.job_name],
-            self.heatmap[largest_job.job_name][job.job_name]
-        ])
+        avg_speedup = self.candidates.average(job, largest_job)
         # speedup ratio
         if self.ll_avg_speedup > 0:
             speedup_r = avg_speedup ** (2 / self.ll_avg_speedup)
@@ -96,11 +91,8 @@ class BalancingRanksCoscheduler(RanksCoscheduler):
         frag_r = cores_r * (1 - self.fragmentation) +\
                 (1 - cores_r) * self.fragmentation
 
-        # Average speedup between xunit's largest job and the job candidate
-        avg_speedup = avg([
-            self.heatmap[job.job_name][co_job.job_name],
-            self.heatmap[co_job.job_name][job.job_name]
-        ])
+        # Average speedup between the job and the co-job candidate
+        avg_speedup = self.candidates.average(job, co_job)
         # speedup ratio
         if self.ll_avg_speedup > 0:
             speedup_r = avg_speedup ** (2 / self.ll_avg_speedup)
@@ -109,10 +101,14 @@ class BalancingRanksCoscheduler(RanksCoscheduler):
 
         return float(rank_r * speedup_r * frag_r)
 
-    def xunit_avg_speedup(self, xunit: list[Job]) -> float:
-        return float(avg([job.speedup for job in xunit]))
+    def xunit_avg_speedup(self, xunit: ExecutionUnit) -> float:
+        speedups = [job.speedup for job in xunit]
+        # The empty space of the unit counts as a job without speedup
+        if xunit.free_cores > 0:
+            speedups.append(1)
+        return float(sum(speedups) / len(speedups))
 
-    def after_deployment(self, xunit: list[Job]):
+    def after_deployment(self, xunit: ExecutionUnit):
         RanksCoscheduler.after_deployment(self, xunit)
 
         # Left-side list overall speedup metrics
@@ -126,12 +122,9 @@ class BalancingRanksCoscheduler(RanksCoscheduler):
         if binded_cores == 0:
             return
 
-        prev_binded_cores = binded_cores - 2 * xunit[0].binded_cores
+        prev_binded_cores = binded_cores - 2 * xunit.binded_cores
 
-        added_empty_space = sum(map(
-            lambda job: job.binded_cores,
-            filter(lambda job: type(job) == EmptyJob, xunit)
-        ))
+        added_empty_space = 0 if xunit.compact else xunit.free_cores
 
         self.fragmentation = ((self.fragmentation * prev_binded_cores) +\
                 added_empty_space) / binded_cores
@@ -7,7 +7,7 @@ sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), "../../../../"
 )))
 
-from realsim.jobs.jobs import Job
+from realsim.jobs import Job, ExecutionUnit
 from realsim.scheduler.coschedulers.ranks.ranks import RanksCoscheduler
 
 
@@ -16,7 +16,7 @@ class RandomRanksCoscheduler(RanksCoscheduler):
     name = "Random Ranks Co-Scheduler"
     descriptions = ""
 
-    def xunits_order(self, xunit: list[Job]) -> float:
+    def xunits_order(self, xunit: ExecutionUnit) -> float:
         seed(time_ns() % (2 ** 32))
         return float(randint(len(self.cluster.waiting_queue)))
 
@@ -6,12 +6,85 @@ sys.path.append(os.path.abspath(os.path.join(
     os.path.dirname(__file__), "../../../../"
 )))
 
-from realsim.jobs.jobs import Job
+from realsim.jobs import Job, ExecutionUnit
 from realsim.jobs.utils import deepcopy_list
 from realsim.scheduler.coscheduler import Coscheduler, ScikitModel
 
-from numpy import average as avg
+from numpy import average as avg, flatnonzero, ndarray, zeros
 from abc import ABC
+from typing import Iterator
+
+
+class Ranks:
+    """Number of good pairings of every waiting job; the waiting jobs it is
+    compatible with. Two jobs are compatible if the average of their speedups
+    when co-scheduled is above the ranks threshold, which depends only on
+    their loads. So the ranks are kept per load: the rank of a load is the
+    number of waiting jobs whose load is compatible with it, and a job
+    entering or leaving the waiting queue only changes the ranks of the loads
+    compatible with its own.
+
+    The ranks observe the waiting queue of the cluster, which notifies them
+    of every job that enters or leaves it.
+    """
+
+    def __init__(self, compatible: ndarray):
+        # Job id --> load index of the ranked jobs
+        self.loads: dict[int, int] = dict()
+        self.update(compatible)
+
+    def update(self, compatible: ndarray) -> None:
+        """Count the ranks of the loads again after the compatible loads
+        changed; the loads keep their indices
+        """
+        # Load index --> indices of the compatible loads
+        self.partners: list[list[int]] = [flatnonzero(row).tolist() for row in compatible]
+        # A job is not paired with itself
+        self.itself: list[int] = [int(compatible[i, i]) for i in range(len(compatible))]
+        # Load index --> number of waiting jobs compatible with the load
+        self.load_ranks: list[int] = [0] * len(compatible)
+        for load_index in self.loads.values():
+            for partner in self.partners[load_index]:
+                self.load_ranks[partner] += 1
+
+    def __getitem__(self, job_id: int) -> int:
+        load_index = self.loads[job_id]
+        return self.load_ranks[load_index] - self.itself[load_index]
+
+    def __contains__(self, job_id: int) -> bool:
+        return job_id in self.loads
+
+    def __len__(self) -> int:
+        return len(self.loads)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.loads)
+
+    def add(self, job: Job) -> None:
+        """A job entered the waiting queue
+        """
+        self.loads[job.job_id] = job.load_index
+        load_ranks = self.load_ranks
+        for partner in self.partners[job.load_index]:
+            load_ranks[partner] += 1
+
+    def remove(self, job_id: int) -> None:
+        """A job left the waiting queue
+        """
+        load_index = self.loads.pop(job_id)
+        load_ranks = self.load_ranks
+        for partner in self.partners[load_index]:
+            load_ranks[partner] -= 1
+
+    def job_added(self, job: Job) -> None:
+        """A job entered the waiting queue
+        """
+        self.add(job)
+
+    def job_removed(self, job: Job) -> None:
+        """A job left the waiting queue
+        """
+        self.remove(job.job_id)
 
 
 class RanksCoscheduler(Coscheduler, ABC):
@@ -36,7 +109,7 @@ class RanksCoscheduler(Coscheduler, ABC):
                                co-scheduling threshold in order to not fall to
                                an infinite loop in the simulation loop""")
 
-        self.ranks : dict[int, int] = dict() # jobId --> good pairings
+        self.ranks : Ranks = Ranks(zeros((0, 0), dtype=bool)) # jobId --> good pairings
         self.ranks_threshold = ranks_threshold
         Coscheduler.__init__(self, 
                              backfill_enabled=backfill_enabled,
@@ -44,37 +117,26 @@ class RanksCoscheduler(Coscheduler, ABC):
                              system_utilization=system_utilization,
                              engine=engine)
 
-    def update_ranks(self):
-
-        self.ranks = {job.job_id : 0 for job in self.cluster.waiting_queue}
-
-        # Update ranks for each job
-        for i, job in enumerate(self.cluster.waiting_queue):
-
-            for co_job in self.cluster.waiting_queue[i+1:]:
-
-                job_speedup = self.heatmap[job.job_name][co_job.job_name]
-                co_job_speedup = self.heatmap[co_job.job_name][job.job_name]
-
-                if job_speedup is None or co_job_speedup is None:
-                    continue
-
-                avg_speedup = (job_speedup + co_job_speedup) / 2
-
-                if avg_speedup > self.ranks_threshold:
-                    self.ranks[job.job_id] += 1
-                    self.ranks[co_job.job_id] += 1
+    def compatible(self) -> ndarray:
+        """Return the matrix of the pairs of loads whose average speedup
+        when co-scheduled is above the ranks threshold
+        """
+        values = self.heatmap.values
+        known = self.heatmap.mask & self.heatmap.mask.T
+        return known & ((values + values.T) / 2 > self.ranks_threshold)
 
     def setup(self):
 
         # Create heatmap
         Coscheduler.setup(self)
 
-        # Create ranks
-        self.update_ranks()
+        # Create ranks; they are kept up to date by the waiting queue
+        self.ranks = Ranks(self.compatible())
+        self.cluster.waiting_queue.observe(self.ranks)
 
-    def after_deployment(self, xunit: list[Job]):
-        self.update_ranks()
+    def heatmap_changed(self):
+        Coscheduler.heatmap_changed(self)
+        self.ranks.update(self.compatible())
 
     def deploying_wait_compact(self, deploying_list):
 
@@ -87,14 +149,15 @@ class RanksCoscheduler(Coscheduler, ABC):
                         job.binded_cores = job.full_node_cores
 
                         # Deployment!
-                        deploying_list.append([job])
+                        xunit = ExecutionUnit(job, compact=True)
+                        deploying_list.append(xunit)
 
-                        self.cluster.free_cores -= job.binded_cores
+                        self.cluster.allocate(xunit)
                         # Remove from the waiting queue
                         self.cluster.waiting_queue.remove(job)
 
                         self.deploying = True
-                        self.after_deployment([job])
+                        self.after_deployment(xunit)
 
 
         return
@@ -104,11 +167,8 @@ class RanksCoscheduler(Coscheduler, ABC):
         # Reset deploying flag
         self.deploying = False
 
-        # Update ranks
-        self.update_ranks()
-
         # List of jobs to deploy
-        deploying_list: list[list[Job]] = list()
+        deploying_list: list[ExecutionUnit] = list()
 
         # First of all deploy the filled xunits
         deploying_list.extend(self.cluster.filled_xunits())
@@ -0,0 +1,196 @@
+"""
+Heatmap of the speedups of co-scheduled loads. The speedups depend only on the
+pair of loads, so they are kept in a dense matrix indexed by an integer id for
+every distinct load instead of a dictionary entry for every pair of jobs.
+"""
+
+import os
+import sys
+from typing import Callable, Optional
+
+sys.path.append(os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../../')
+))
+
+sys.path.append(os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../../../')
+))
+
+from api.loader import Load
+from realsim.jobs import Job
+
+from numpy import isnan, ndarray, ones, pad, zeros
+
+
+class Heatmap:
+    """Matrix of the speedup of a load (row) when it is co-scheduled with
+    another load (column). The mask tells which speedups are known; an unknown
+    speedup is read as None.
+
+    Every job carries the index of its load in `load_index`, which is set when
+    the heatmap is built or, for a job that was not known then, when the job
+    is admitted to the waiting queue; an unseen load grows the heatmap.
+    """
+
+    def __init__(self, names: list[str]):
+        # Full load name --> index of the load
+        self.index: dict[str, int] = {name: i for i, name in enumerate(names)}
+        self.names = names
+        self.values: ndarray = zeros((len(names), len(names)))
+        self.mask: ndarray = zeros((len(names), len(names)), dtype=bool)
+        # Pairs of loads that may be co-scheduled
+        self.pairs: ndarray = zeros((len(names), len(names)), dtype=bool)
+        # Load of every index
+        self.loads: list[Load] = list()
+        # Full load name --> number of indexed jobs of the load
+        self.counts: dict[str, int] = dict()
+        # Rows of the matrix as lists with None for the unknown speedups;
+        # reading a single speedup from a list is much faster than from an
+        # array
+        self.rows: list[list[Optional[float]]] = list()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def for_jobs(cls, jobs: list[Job]) -> 'Heatmap':
+        """Return an empty heatmap of the loads of `jobs` and set the load
+        index of every job. A load is paired with itself only if it has at
+        least two jobs.
+        """
+        # The load of every index and its number of jobs
+        loads: dict[str, Load] = dict()
+        counts: dict[str, int] = dict()
+        for job in jobs:
+            if job.load is None:
+                raise RuntimeError("A job with an empty load was found inside the waiting queue at the startup stage")
+            name = job.load.full_load_name
+            if name not in loads:
+                loads[name] = job.load
+                counts[name] = 0
+            counts[name] += 1
+
+        heatmap = cls(list(loads))
+        heatmap.loads = list(loads.values())
+        heatmap.counts = counts
+
+        for job in jobs:
+            job.load_index = heatmap.index[job.load.full_load_name]
+
+        heatmap.pairs = ones((len(heatmap), len(heatmap)), dtype=bool)
+        for i, name in enumerate(heatmap.names):
+            if counts[name] < 2:
+                heatmap.pairs[i, i] = False
+
+        return heatmap
+
+    def admit(self, job: Job) -> list[int]:
+        """Set the load index of a job that arrives after the heatmap was
+        built and return the indices of the loads whose pairs changed, whose
+        speedups are not yet set. An unseen load is added with its pairs to
+        every other load and a load is paired with itself at its second job.
+        """
+        if job.load is None:
+            raise RuntimeError("A job with an empty load was found inside the waiting queue")
+
+        name = job.load.full_load_name
+        index = self.index.get(name)
+
+        # Already indexed when the heatmap was built
+        if index is not None and job.load_index == index:
+            return []
+
+        if index is None:
+            index = self.add_load(job.load)
+            job.load_index = index
+            self.counts[name] = 1
+            return [index]
+
+        job.load_index = index
+        self.counts[name] += 1
+        if self.pairs[index, index]:
+            return []
+
+        self.pairs[index, index] = True
+        return [index]
+
+    def add_load(self, load: Load) -> int:
+        """Add a load paired with every other load and return its index. The
+        speedups of the new pairs are unknown until set.
+        """
+        index = len(self.names)
+        self.index[load.full_load_name] = index
+        self.names.append(load.full_load_name)
+        self.loads.append(load)
+
+        size = index + 1
+        self.values = pad(self.values, ((0, 1), (0, 1)))
+        self.mask = pad(self.mask, ((0, 1), (0, 1)))
+        self.pairs = pad(self.pairs, ((0, 1), (0, 1)), constant_values=True)
+        self.pairs[index, index] = False
+
+        self.rows.append([None] * size)
+        for row in self.rows[:index]:
+            row.append(None)
+
+        return index
+
+    @classmethod
+    def build(cls,
+              jobs: list[Job],
+              speedup: Callable[[Load, Load], Optional[float]]) -> 'Heatmap':
+        """Build the heatmap of the loads of `jobs` and set the load index of
+        every job. `speedup(load, co_load)` returns the speedup of `load` when
+        co-scheduled with `co_load` or None if unknown.
+        """
+        heatmap = cls.for_jobs(jobs)
+        heatmap.fill(speedup)
+        return heatmap
+
+    def fill(self,
+             speedup: Callable[[Load, Load], Optional[float]],
+             indices: Optional[list[int]] = None) -> None:
+        """Set the speedup of every pair of loads one pair at a time or, if
+        `indices` is given, only of the pairs with one of these loads
+        """
+        everyone = range(len(self.loads))
+        if indices is None:
+            pairs = [(i, j) for i in everyone for j in everyone]
+        else:
+            changed = set(indices)
+            pairs = [(i, j) for i in everyone for j in everyone
+                     if i in changed or j in changed]
+
+        for i, j in pairs:
+            if not self.pairs[i, j]:
+                continue
+            value = speedup(self.loads[i], self.loads[j])
+            if value is not None:
+                self.values[i, j] = value
+                self.mask[i, j] = True
+
+        self.update_rows()
+
+    def fill_matrix(self, values: ndarray) -> None:
+        """Set the speedups of all the pairs of loads from a matrix whose
+        rows and columns follow the indices of the loads
+        """
+        # A prediction that is not a number is an unknown speedup
+        known = self.pairs & ~isnan(values)
+        self.values[known] = values[known]
+        self.mask[:] = known
+
+        self.update_rows()
+
+    def update_rows(self) -> None:
+        """Refresh the rows after the matrix or the mask changed
+        """
+        self.rows = [[value if known else None
+                      for value, known in zip(values, mask)]
+                     for values, mask in zip(self.values.tolist(), self.mask.tolist())]
+
+    def speedup(self, job: Job, co_job: Job) -> Optional[float]:
+        """Return the speedup of `job` when co-scheduled with `co_job` or None
+        if it is unknown
+        """
+        return self.rows[job.load_index][co_job.load_index]
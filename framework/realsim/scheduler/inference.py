@@ -0,0 +1,140 @@
+"""
+Batched inference of the speedups of co-scheduled loads. The features of a
+pair of loads are the tag of the load followed by the tag of the co-load; the
+features of every ordered pair are predicted with a single call to the engine.
+The predictions can be kept in a cache on disk, so repeated simulations with
+the same engine and loads do not predict them again.
+"""
+
+import gzip
+import hashlib
+import os
+import pickle
+from typing import Optional, Protocol
+
+from numpy import array, concatenate, empty, ndarray, repeat, tile
+
+
+class ScikitModel(Protocol):
+    def predict(self, X):
+        pass
+
+
+def engine_fingerprint(engine: ScikitModel) -> str:
+    """Return a digest that identifies the engine; the pickled engine, so
+    engines trained differently have different fingerprints
+    """
+    fingerprint = getattr(engine, "fingerprint", None)
+    if fingerprint is not None:
+        return str(fingerprint)
+
+    try:
+        data = pickle.dumps(engine, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        raise RuntimeError(f"Cannot fingerprint the engine {type(engine).__name__}; "
+                           "provide a `fingerprint` attribute or do not use a cache")
+
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class PredictionCache:
+    """Predictions of an engine on disk, keyed by the features of a pair of
+    loads. There is a file for every engine fingerprint inside `path`.
+    """
+
+    def __init__(self, path: str, engine: ScikitModel):
+        self.path = os.path.join(path, f"{engine_fingerprint(engine)}.pkl.gz")
+        # Features of a pair --> prediction
+        self.predictions: dict[bytes, float] = dict()
+        # True if there are predictions not saved yet
+        self.changed = False
+
+        if os.path.exists(self.path):
+            with gzip.open(self.path, "rb") as fd:
+                self.predictions = pickle.load(fd)
+
+    def lookup(self, features: ndarray) -> tuple[ndarray, list[int]]:
+        """Return the cached predictions for the rows of `features` and the
+        indices of the rows that are not cached
+        """
+        predictions = empty(len(features))
+        missing: list[int] = list()
+
+        for i, row in enumerate(features):
+            value = self.predictions.get(row.tobytes())
+            if value is None:
+                missing.append(i)
+            else:
+                predictions[i] = value
+
+        return predictions, missing
+
+    def update(self, features: ndarray, predictions: ndarray) -> None:
+        for row, value in zip(features, predictions):
+            self.predictions[row.tobytes()] = float(value)
+        self.changed = True
+
+    def save(self) -> None:
+        """Write the predictions to disk; the file is replaced atomically
+        """
+        if not self.changed:
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, "wb") as fd:
+            pickle.dump(self.predictions, fd, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(tmp_path, self.path)
+        self.changed = False
+
+
+def pair_features(tags: ndarray) -> ndarray:
+    """Return the features of every ordered pair of tags; the row i * L + j
+    holds the tag of i followed by the tag of j
+    """
+    num_of_tags = len(tags)
+    return concatenate((repeat(tags, num_of_tags, axis=0),
+                        tile(tags, (num_of_tags, 1))), axis=1)
+
+
+def predict_speedups(engine: ScikitModel,
+                     tags: list[list[float]],
+                     cache_path: Optional[str] = None,
+                     chunk_size: int = 65536) -> ndarray:
+    """Return the matrix of the predicted speedup of every load (row) when
+    co-scheduled with every other load (column). `tags` has the tag of every
+    load. The engine is called once for every `chunk_size` pairs that are not
+    found in the cache at `cache_path`.
+    """
+    if chunk_size <= 0:
+        raise RuntimeError(f"Chunk size should be positive: {chunk_size}")
+
+    tags = array(tags, dtype=float)
+    num_of_tags = len(tags)
+
+    if num_of_tags == 0:
+        return empty((0, 0))
+
+    features = pair_features(tags)
+
+    cache: Optional[PredictionCache] = None
+    if cache_path is not None:
+        cache = PredictionCache(cache_path, engine)
+        predictions, missing = cache.lookup(features)
+    else:
+        predictions = empty(len(features))
+        missing = list(range(len(features)))
+
+    for start in range(0, len(missing), chunk_size):
+        rows = missing[start:start + chunk_size]
+        predicted = array(engine.predict(features[rows]), dtype=float).reshape(len(rows))
+        predictions[rows] = predicted
+        if cache is not None:
+            cache.update(features[rows], predicted)
+
+    if cache is not None:
+        cache.save()
+
+    return predictions.reshape(num_of_tags, num_of_tags)
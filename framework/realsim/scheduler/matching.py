@@ -0,0 +1,189 @@
+"""
+Pairing of waiting jobs as a maximum-weight matching. The waiting jobs are the
+vertices of a compatibility graph whose edges join the jobs that may be
+co-scheduled; the weight of an edge is the average speedup of the pair. A
+pair occupies twice the half node cores of its larger job, and the pairs
+together should fit in the free cores of the cluster.
+
+Small queues are matched exactly by a branch and bound search over the
+matchings; the number of matchings grows exponentially with the jobs, so the
+exact search is limited to `MAX_EXACT_LIMIT` jobs. Large queues are matched
+greedily by visiting the edges from the heaviest; the weight of
+an edge depends only on the loads of the two jobs, so the edges are sorted
+once per pair of loads instead of once per pair of jobs.
+"""
+
+import os
+import sys
+from collections import deque
+from typing import Optional
+
+sys.path.append(os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../../')
+))
+
+from realsim.jobs import Job
+from realsim.scheduler.candidates import CandidateIndex
+
+
+# Largest number of jobs that may be matched exactly
+MAX_EXACT_LIMIT = 12
+
+# Slack of the bound of the exact search against the round-off of the sums of
+# weights; a branch is pruned only if it cannot be heavier even by the slack
+BOUND_SLACK = 1e-9
+
+
+def pair_cores(job: Job, co_job: Job) -> int:
+    """Number of cores of the cluster occupied by a pair of jobs
+    """
+    return 2 * max(job.half_node_cores, co_job.half_node_cores)
+
+
+def exact_pairs(jobs: list[Job],
+                index: CandidateIndex,
+                free_cores: int) -> list[tuple[Job, Job]]:
+    """Return the pairs of the matching of `jobs` with the largest total
+    weight that fits in `free_cores`. Among matchings of equal weight the
+    one that pairs the earlier jobs is preferred.
+    """
+    num_of_jobs = len(jobs)
+
+    # Job position --> positions of the later compatible jobs
+    edges: list[list[int]] = [
+            [v for v in range(u + 1, num_of_jobs) if index.compatible(jobs[u], jobs[v])]
+            for u in range(num_of_jobs)
+    ]
+
+    # Upper bound of the weight the jobs from a position on can add; every
+    # pair is worth at most half the heaviest edge of each of its two jobs
+    heaviest = [0.0] * num_of_jobs
+    for u in range(num_of_jobs):
+        for v in edges[u]:
+            weight = index.average(jobs[u], jobs[v])
+            heaviest[u] = max(heaviest[u], weight)
+            heaviest[v] = max(heaviest[v], weight)
+
+    bound = [0.0] * (num_of_jobs + 1)
+    for u in reversed(range(num_of_jobs)):
+        bound[u] = bound[u + 1] + heaviest[u] / 2
+
+    best_weight = 0.0
+    best_pairs: list[tuple[int, int]] = list()
+
+    pairs: list[tuple[int, int]] = list()
+    matched = [False] * num_of_jobs
+
+    def search(u: int, weight: float, cores: int) -> None:
+        nonlocal best_weight, best_pairs
+
+        # Find the next job that is not paired yet
+        while u < num_of_jobs and matched[u]:
+            u += 1
+
+        if u == num_of_jobs:
+            if weight > best_weight:
+                best_weight = weight
+                best_pairs = list(pairs)
+            return
+
+        # The rest of the jobs cannot make a heavier matching
+        if weight + bound[u] + BOUND_SLACK <= best_weight:
+            return
+
+        matched[u] = True
+
+        # Pair `u` with every later compatible job that fits
+        for v in edges[u]:
+            if matched[v]:
+                continue
+            needed = pair_cores(jobs[u], jobs[v])
+            if needed > cores:
+                continue
+            matched[v] = True
+            pairs.append((u, v))
+            search(u + 1, weight + index.average(jobs[u], jobs[v]), cores - needed)
+            pairs.pop()
+            matched[v] = False
+
+        # Leave `u` without a pair
+        search(u + 1, weight, cores)
+
+        matched[u] = False
+
+    search(0, 0.0, free_cores)
+
+    return [(jobs[u], jobs[v]) for u, v in best_pairs]
+
+
+def greedy_pairs(jobs: list[Job],
+                 index: CandidateIndex,
+                 free_cores: int) -> list[tuple[Job, Job]]:
+    """Return the pairs of a matching of `jobs` that fits in `free_cores`,
+    taking the heaviest edge that fits first. Edges of equal weight join the
+    earlier jobs first.
+    """
+    # Load index --> jobs of the load in order
+    by_load: dict[int, deque[Job]] = dict()
+    for job in jobs:
+        by_load.setdefault(job.load_index, deque()).append(job)
+
+    # Pairs of loads from the heaviest; a pair with itself needs two jobs
+    load_pairs = [(index.averages[i][j], i, j)
+                  for i in by_load
+                  for j in index.partners[i]
+                  if j in by_load and (j > i or (j == i and len(by_load[i]) > 1))]
+    load_pairs.sort(key=lambda load_pair: load_pair[0], reverse=True)
+
+    pairs: list[tuple[Job, Job]] = list()
+    cores = free_cores
+
+    def first_fitting(queue: deque[Job]) -> Optional[Job]:
+        # The free cores only decrease, so a job that does not fit now will
+        # never fit and it is dropped
+        while queue and 2 * queue[0].half_node_cores > cores:
+            queue.popleft()
+        return queue.popleft() if queue else None
+
+    for _, i, j in load_pairs:
+        while True:
+            job = first_fitting(by_load[i])
+            if job is None:
+                break
+
+            co_job = first_fitting(by_load[j])
+            if co_job is None:
+                by_load[i].appendleft(job)
+                break
+
+            # Both jobs fit on their own so the pair fits
+            pairs.append((job, co_job))
+            cores -= pair_cores(job, co_job)
+
+    return pairs
+
+
+def max_weight_pairs(jobs: list[Job],
+                     index: CandidateIndex,
+                     free_cores: int,
+                     exact_limit: int = 10) -> list[tuple[Job, Job]]:
+    """Return the pairs of a maximum-weight matching of the waiting `jobs`
+    that fits in `free_cores`. The matching is exact if at most `exact_limit`
+    jobs can be paired and greedy otherwise; `exact_limit` is capped at
+    `MAX_EXACT_LIMIT`.
+    """
+    # Jobs that fit in the free cores and have a compatible job to pair with
+    fitting = [job for job in jobs if 2 * job.half_node_cores <= free_cores]
+
+    loads: dict[int, int] = dict()
+    for job in fitting:
+        loads[job.load_index] = loads.get(job.load_index, 0) + 1
+
+    fitting = [job for job in fitting
+               if any(loads.get(partner, 0) > (partner == job.load_index)
+                      for partner in index.partners[job.load_index])]
+
+    if len(fitting) <= min(exact_limit, MAX_EXACT_LIMIT):
+        return exact_pairs(fitting, index, free_cores)
+
+    return greedy_pairs(fitting, index, free_cores)
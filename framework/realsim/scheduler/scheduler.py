@@ -1,6 +1,6 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import TypeVar, Generic, TYPE_CHECKING
+from typing import Optional, TypeVar, Generic, TYPE_CHECKING
 import os
 import sys
 
@@ -67,6 +67,12 @@ class Scheduler(ABC, Generic[Cluster]):
         """
         pass
 
+    def admit(self, job: Job) -> None:
+        """A job arrives to the waiting queue; called before the job enters
+        the queue
+        """
+        pass
+
     def backfill(self) -> bool:
         """A backfill algorithm should always return a boolean result that
         re-iterates [True] or not [False] the scheduling process
@@ -76,6 +82,15 @@ class Scheduler(ABC, Generic[Cluster]):
         return True
         
 
+    def scheduling_signature(self) -> Optional[tuple]:
+        """Return the state that decides the outcome of a deployment. After a
+        deployment fails the cluster does not call the scheduler again while
+        the signature stays the same, so two states with the same signature
+        must lead to the same failed deployment. By default the signature is
+        None and the scheduler is always called.
+        """
+        return None
+
     @abstractmethod
     def deploy(self) -> bool:
         """Abstract method to deploy the new execution list to the cluster
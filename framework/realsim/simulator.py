@@ -1,5 +1,6 @@
 import plotly.graph_objects as go
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Optional
 from multiprocessing import Manager
 from cProfile import Profile
 import os
@@ -10,21 +11,24 @@ sys.path.append(os.path.abspath(os.path.join(
 )))
 
 from realsim.cluster.exhaustive import ClusterExhaustive
+from realsim.cluster.compact import ClusterCompact
+from realsim.scheduler.compact import CompactScheduler
+from realsim.cluster.snapshot import branch
 from realsim.logger.logger import Logger
 
 
 def run_sim(core):
 
-    cluster, scheduler, logger, comm_queue = core
+    cluster, scheduler, logger, comm_queue, warm = core
 
-    cluster.setup()
+    # A warm cluster continues from the state it was branched at
+    if not warm:
+        cluster.setup()
+        logger.setup()
     scheduler.setup()
-    logger.setup()
 
-    # The stopping condition is for the waiting queue and the execution list
-    # to become empty
-    while cluster.preloaded_queue != [] or cluster.waiting_queue != [] or cluster.execution_list != []:
-        cluster.step()
+    # The simulation stops when every job has finished
+    cluster.run()
 
     default_list = comm_queue.get()
     comm_queue.put(default_list)
@@ -84,10 +88,20 @@ class Simulation:
         self.futures = dict()
         self.results = dict()
 
+        # True if the simulations continue from the warm state of the default
+        # cluster
+        self.warm = False
+
+        # Limits of every simulation run
+        self.budgets = dict()
+
         for sched_class, hyperparams in schedulers_bundle:
 
-            # Setup cluster
-            cluster = ClusterExhaustive(nodes, ppn)
+            # Setup cluster; the compact schedulers run on the fast path
+            if issubclass(sched_class, CompactScheduler):
+                cluster = ClusterCompact(nodes, ppn)
+            else:
+                cluster = ClusterExhaustive(nodes, ppn)
             cluster.preload_jobs(jobs_set)
 
             # Setup scheduler
@@ -113,12 +127,56 @@ class Simulation:
             self.sims[scheduler.name] = (cluster, 
                                          scheduler, 
                                          logger, 
-                                         self.comm_queue)
+                                         self.comm_queue,
+                                         self.warm)
 
     def set_default(self, name):
         # Set name for default scheduling algorithm
         self.default = name
 
+    def set_budgets(self,
+                    wall_time: Optional[float] = None,
+                    max_events: Optional[int] = None,
+                    stall_steps: int = 1000):
+        """Abort any simulation that takes more than `wall_time` seconds,
+        reaches more than `max_events` events or stalls for `stall_steps`
+        steps
+        """
+        self.budgets = {"wall_time": wall_time,
+                        "max_events": max_events,
+                        "stall_steps": stall_steps}
+
+        self.default_cluster.set_budgets(**self.budgets)
+        for cluster, _, _, _, _ in self.sims.values():
+            cluster.set_budgets(**self.budgets)
+
+    def warmup(self, until_time: float):
+        """Simulate the default scheduler once until `until_time`. Every other
+        scheduler continues from a branch of this warm state instead of
+        simulating the same prefix from the start.
+        """
+
+        if self.warm:
+            raise RuntimeError("The simulation has already been warmed up")
+
+        self.default_cluster.setup()
+        self.default_scheduler.setup()
+        self.default_logger.setup()
+
+        cluster = self.default_cluster
+        cluster.run(until_time=until_time)
+
+        self.warm = True
+
+        # Branch the warm state for every other scheduler
+        for policy, (_, scheduler, _, comm_queue, _) in self.sims.items():
+            warm_cluster = branch(cluster, scheduler)
+            self.sims[policy] = (warm_cluster,
+                                 scheduler,
+                                 warm_cluster.logger,
+                                 comm_queue,
+                                 self.warm)
+
     def run(self):
 
         # Fork out the workers
@@ -127,14 +185,13 @@ class Simulation:
             self.futures[policy] = self.executor.submit(run_sim, sim)
 
         # Execute the default scheduler
-        self.default_cluster.setup()
-        self.default_scheduler.setup()
-        self.default_logger.setup()
+        if not self.warm:
+            self.default_cluster.setup()
+            self.default_scheduler.setup()
+            self.default_logger.setup()
 
-        # The stopping condition is for the waiting queue and the execution list
-        # to become empty
-        while self.default_cluster.preloaded_queue != [] or self.default_cluster.waiting_queue != [] or self.default_cluster.execution_list != []:
-            self.default_cluster.step()
+        # The simulation stops when every job has finished
+        self.default_cluster.run()
 
         # Submit to the shared list the results
         self.comm_queue.put([self.default_cluster.makespan, self.default_logger])
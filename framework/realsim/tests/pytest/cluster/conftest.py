@@ -0,0 +1,32 @@
+"""
+Fixtures of the cluster tests; factories of synthetic workloads and of
+clusters prepared to simulate them.
+"""
+
+import pytest
+
+from workloads import make_loads, make_jobs, prepare
+
+
+@pytest.fixture
+def workload():
+    """Factory of the loads and the jobs of a seeded synthetic workload:
+
+        loads, jobs = workload(seed, num_of_jobs=60, dynamic=True)
+    """
+    def build(seed, num_of_jobs=60, dynamic=False, num_of_loads=8):
+        loads = make_loads(num_of_loads, seed)
+        return loads, make_jobs(loads, num_of_jobs, seed + 1, dynamic)
+    return build
+
+
+@pytest.fixture
+def simulation():
+    """Factory of clusters with their scheduler and logger set up and the
+    jobs preloaded:
+
+        cluster = simulation(ClusterExhaustive, CompactScheduler(), jobs)
+    """
+    def build(cluster_cls, scheduler, jobs, nodes=64, cores_per_node=16):
+        return prepare(cluster_cls(nodes, cores_per_node), scheduler, jobs)
+    return build
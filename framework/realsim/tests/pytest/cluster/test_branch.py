@@ -0,0 +1,52 @@
+import pytest
+
+from workloads import same_simulation
+from realsim.cluster.exhaustive import ClusterExhaustive
+from realsim.cluster.snapshot import branch
+from realsim.scheduler.compact import CompactScheduler
+from realsim.scheduler.coschedulers.ranks.balancing import BalancingRanksCoscheduler
+
+SEED = 61
+
+
+@pytest.mark.parametrize("scheduler_cls", [CompactScheduler, BalancingRanksCoscheduler])
+def test_branch(workload, simulation, scheduler_cls):
+    _, jobs = workload(SEED, dynamic=True)
+
+    reference = simulation(ClusterExhaustive, scheduler_cls(), jobs)
+    assert reference.run()
+
+    cluster = simulation(ClusterExhaustive, scheduler_cls(), jobs)
+    assert not cluster.run(max_events=20)
+
+    copy = branch(cluster)
+    assert copy is not cluster
+    assert copy.scheduler is not cluster.scheduler
+
+    # The copy and the original continue independently of each other
+    assert copy.run()
+    assert cluster.num_of_events == 20
+    assert cluster.run()
+
+    assert same_simulation(copy, reference)
+    assert same_simulation(cluster, reference)
+
+
+def test_branch_with_another_scheduler(workload, simulation):
+    _, jobs = workload(SEED, dynamic=True)
+
+    cluster = simulation(ClusterExhaustive, CompactScheduler(), jobs)
+    assert not cluster.run(max_events=20)
+    events = cluster.num_of_events
+
+    scheduler = BalancingRanksCoscheduler()
+    copy = branch(cluster, scheduler)
+    scheduler.setup()
+
+    assert copy.scheduler is scheduler
+    assert scheduler.cluster is copy
+    assert cluster.scheduler is not scheduler
+
+    assert copy.run()
+    assert len(copy.finished_jobs) == len(jobs)
+    assert cluster.num_of_events == events
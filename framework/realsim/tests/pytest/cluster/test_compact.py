@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from realsim.cluster.compact import ClusterCompact
+from realsim.cluster.exhaustive import ClusterExhaustive
+from realsim.cluster.nodes import NodeMap
+from realsim.scheduler.compact import CompactScheduler
+from realsim.scheduler.coschedulers.ranks.balancing import BalancingRanksCoscheduler
+
+
+@pytest.fixture
+def bindings(monkeypatch):
+    """Every binding and release of nodes in the order they happen
+    """
+    records = list()
+
+    allocate = NodeMap.allocate
+    release = NodeMap.release
+
+    def record_allocate(self, nodes, cores=-1):
+        records.append(("allocate", nodes.tolist()))
+        allocate(self, nodes, cores)
+
+    def record_release(self, nodes):
+        records.append(("release", nodes.tolist()))
+        release(self, nodes)
+
+    monkeypatch.setattr(NodeMap, "allocate", record_allocate)
+    monkeypatch.setattr(NodeMap, "release", record_release)
+
+    return records
+
+
+@pytest.mark.parametrize("seed, dynamic", [(11, False), (12, True)])
+def test_fast_path(workload, simulation, bindings, seed, dynamic):
+    _, jobs = workload(seed, dynamic=dynamic)
+
+    reference = simulation(ClusterExhaustive, CompactScheduler(), jobs)
+    assert reference.run()
+    reference_bindings = list(bindings)
+
+    bindings.clear()
+
+    # Nothing observes the steps, so the compact cluster takes its fast path
+    cluster = simulation(ClusterCompact, CompactScheduler(), jobs)
+    assert cluster.has_fast_path()
+    assert cluster.run()
+
+    assert cluster.makespan == reference.makespan
+    assert cluster.finished_jobs == reference.finished_jobs
+    assert cluster.num_of_events == reference.num_of_events
+    assert cluster.logger.cluster_events == reference.logger.cluster_events
+    assert json.dumps(cluster.logger.job_events) == json.dumps(reference.logger.job_events)
+
+    # The same nodes are bound in the same order and all of them are free at
+    # the end
+    assert sorted(bindings) == sorted(reference_bindings)
+    assert ([b for b in bindings if b[0] == "allocate"]
+            == [b for b in reference_bindings if b[0] == "allocate"])
+    assert cluster.node_map.free.sum() == cluster.total_cores
+
+
+def test_fast_path_after_warm_up(workload, simulation):
+    _, jobs = workload(12, dynamic=True)
+
+    reference = simulation(ClusterExhaustive, CompactScheduler(), jobs)
+    assert reference.run()
+
+    # The first steps run on the exhaustive path and leave execution units
+    # that the fast path finishes
+    cluster = simulation(ClusterCompact, CompactScheduler(), jobs)
+    assert not cluster.run(max_events=10)
+    assert cluster.execution_list != []
+    assert cluster.run()
+
+    assert cluster.makespan == reference.makespan
+    assert cluster.finished_jobs == reference.finished_jobs
+    assert json.dumps(cluster.logger.job_events) == json.dumps(reference.logger.job_events)
+    assert cluster.execution_list == []
+
+
+def test_no_fast_path_with_coscheduler(workload, simulation):
+    _, jobs = workload(13)
+    cluster = simulation(ClusterCompact, BalancingRanksCoscheduler(), jobs)
+    assert not cluster.has_fast_path()
@@ -0,0 +1,84 @@
+import tracemalloc
+
+import pytest
+
+from realsim.cluster.events import FINISH
+from realsim.cluster.exhaustive import ClusterExhaustive
+from realsim.cluster.tracer import StateTracer
+from realsim.scheduler.compact import CompactScheduler
+from realsim.scheduler.coschedulers.ranks.balancing import BalancingRanksCoscheduler
+
+SEED = 7
+
+
+@pytest.mark.parametrize("scheduler_cls", [CompactScheduler, BalancingRanksCoscheduler])
+def test_stream_is_the_simulation(workload, simulation, scheduler_cls):
+    _, jobs = workload(SEED, dynamic=True)
+
+    reference = simulation(ClusterExhaustive, scheduler_cls(), jobs)
+    assert reference.run()
+
+    cluster = simulation(ClusterExhaustive, scheduler_cls(), jobs)
+    finished = [delta.job_id for delta in cluster.events() if delta.kind == FINISH]
+
+    assert finished == reference.finished_jobs
+    assert cluster.makespan == reference.makespan
+
+    # The logger did not record while streaming and records again afterwards
+    assert cluster.logger.recording
+    assert all(events["trace"] == [] for events in cluster.logger.job_events.values())
+
+
+def test_stream_keeps_the_log(workload, simulation):
+    _, jobs = workload(SEED, dynamic=True)
+
+    reference = simulation(ClusterExhaustive, CompactScheduler(), jobs)
+    assert reference.run()
+
+    cluster = simulation(ClusterExhaustive, CompactScheduler(), jobs)
+    for _ in cluster.events(keep_log=True):
+        pass
+
+    assert cluster.logger.job_events == reference.logger.job_events
+
+
+def memory_growth(cluster, start: int, end: int, keep_log: bool) -> tuple[int, int]:
+    """Stream a simulation and return the growth of the allocated memory and
+    the number of jobs that finished between the events `start` and `end`
+    """
+    memory = None
+    tracemalloc.start()
+    try:
+        # Not every event yields a delta, so the bounds may be stepped over
+        for _ in cluster.events(keep_log=keep_log):
+            if memory is None and cluster.num_of_events >= start:
+                memory = tracemalloc.get_traced_memory()[0]
+                finished = len(cluster.finished_jobs)
+            if cluster.num_of_events >= end:
+                break
+        growth = tracemalloc.get_traced_memory()[0] - memory
+    finally:
+        tracemalloc.stop()
+
+    return growth, len(cluster.finished_jobs) - finished
+
+
+@pytest.mark.parametrize("scheduler_cls", [CompactScheduler, BalancingRanksCoscheduler])
+def test_stream_in_constant_memory(workload, simulation, scheduler_cls):
+    _, jobs = workload(SEED, 600, dynamic=True)
+
+    # Only the per job state of the finished jobs is kept; nothing grows with
+    # the number of steps
+    cluster = simulation(ClusterExhaustive, scheduler_cls(), jobs)
+    cluster.set_tracer(StateTracer(keep=16))
+    growth, finished = memory_growth(cluster, 300, 900, keep_log=False)
+
+    assert finished > 0
+    assert growth < 256 * finished
+    assert len(cluster.tracer.entries) == 16
+
+    # The events of the logger grow at every step
+    cluster = simulation(ClusterExhaustive, scheduler_cls(), jobs)
+    growth, finished = memory_growth(cluster, 300, 900, keep_log=True)
+
+    assert growth > 1024 * finished
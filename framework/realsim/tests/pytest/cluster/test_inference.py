@@ -0,0 +1,65 @@
+import os
+
+import pytest
+from numpy import array
+
+from realsim.scheduler.inference import predict_speedups
+
+
+class CountingEngine:
+    """Engine that predicts the sum of the features and counts the rows it
+    predicts
+    """
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.rows = 0
+
+    def predict(self, X):
+        self.rows += len(X)
+        return X.sum(axis=1)
+
+
+def test_inference_cache(tmp_path):
+    tags = [[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]]
+    expected = array([[sum(tag) + sum(co_tag) for co_tag in tags] for tag in tags])
+
+    # Without a cache every pair is predicted every time
+    engine = CountingEngine("a")
+    assert (predict_speedups(engine, tags) == expected).all()
+    assert (predict_speedups(engine, tags) == expected).all()
+    assert engine.rows == 18
+
+    path = str(tmp_path)
+
+    # Misses; every pair is predicted and saved
+    engine = CountingEngine("a")
+    assert (predict_speedups(engine, tags, path) == expected).all()
+    assert engine.rows == 9
+    assert os.listdir(path) == ["a.pkl.gz"]
+
+    # Hits; the engine is not called
+    engine = CountingEngine("a")
+    assert (predict_speedups(engine, tags, path) == expected).all()
+    assert engine.rows == 0
+
+    # Only the pairs of the new load are predicted
+    engine = CountingEngine("a")
+    predictions = predict_speedups(engine, tags + [[7.0, 8.0]], path, chunk_size=2)
+    assert predictions[3, 0] == 18.0
+    assert engine.rows == 16 - 9
+
+    # Another engine has its own predictions
+    engine = CountingEngine("b")
+    predict_speedups(engine, tags, path)
+    assert engine.rows == 9
+    assert sorted(os.listdir(path)) == ["a.pkl.gz", "b.pkl.gz"]
+
+
+def test_inference_empty():
+    engine = CountingEngine("a")
+    assert predict_speedups(engine, []).shape == (0, 0)
+    assert engine.rows == 0
+
+    with pytest.raises(RuntimeError):
+        predict_speedups(engine, [[1.0]], chunk_size=0)
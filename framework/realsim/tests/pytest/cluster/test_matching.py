@@ -0,0 +1,108 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+from numpy import array, ones
+
+from realsim.scheduler.candidates import CandidateIndex
+from realsim.scheduler.coschedulers.ranks.balancing import BalancingRanksCoscheduler
+from realsim.scheduler.heatmap import Heatmap
+from realsim.scheduler.matching import (MAX_EXACT_LIMIT, exact_pairs,
+                                        greedy_pairs, max_weight_pairs,
+                                        pair_cores)
+
+
+def make_index(values, threshold=1.0):
+    heatmap = Heatmap([f"load{i}" for i in range(len(values))])
+    heatmap.values = array(values, dtype=float)
+    heatmap.mask = ones(heatmap.values.shape, dtype=bool)
+    return CandidateIndex(heatmap, threshold)
+
+
+def make_job(job_id, load_index, half_node_cores=8):
+    return SimpleNamespace(job_id=job_id,
+                           load_index=load_index,
+                           half_node_cores=half_node_cores)
+
+
+def weight(pairs, index):
+    return sum(index.average(job, co_job) for job, co_job in pairs)
+
+
+def best_weight(jobs, index, free_cores):
+    """Weight of the heaviest matching that fits, by visiting all of them
+    """
+    if len(jobs) < 2:
+        return 0.0
+
+    job, rest = jobs[0], jobs[1:]
+
+    # The first job without a pair
+    best = best_weight(rest, index, free_cores)
+
+    for i, co_job in enumerate(rest):
+        cores = pair_cores(job, co_job)
+        if index.compatible(job, co_job) and cores <= free_cores:
+            best = max(best, index.average(job, co_job)
+                             + best_weight(rest[:i] + rest[i + 1:], index, free_cores - cores))
+
+    return best
+
+
+def test_exact_beats_greedy():
+    # The heaviest pair (0, 1) leaves 2 and 3 without a compatible job, while
+    # the pairs (0, 2) and (1, 3) are heavier together
+    index = make_index([[0.5, 1.5, 1.4, 0.5],
+                        [1.5, 0.5, 0.5, 1.4],
+                        [1.4, 0.5, 0.5, 0.5],
+                        [0.5, 1.4, 0.5, 0.5]])
+    jobs = [make_job(i, i) for i in range(4)]
+
+    greedy = greedy_pairs(jobs, index, 64)
+    exact = max_weight_pairs(jobs, index, 64)
+
+    assert [(job.job_id, co_job.job_id) for job, co_job in greedy] == [(0, 1)]
+    assert [(job.job_id, co_job.job_id) for job, co_job in exact] == [(0, 2), (1, 3)]
+
+    # Above the exact limit the matching is greedy
+    assert max_weight_pairs(jobs, index, 64, exact_limit=2) == greedy
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_exact_is_heaviest(seed):
+    rnd = random.Random(seed)
+
+    num_of_loads = rnd.randint(2, 5)
+    values = [[round(rnd.uniform(0.6, 1.5), 1) for _ in range(num_of_loads)]
+              for _ in range(num_of_loads)]
+    index = make_index(values)
+
+    jobs = [make_job(i, rnd.randrange(num_of_loads), rnd.choice([4, 8, 16]))
+            for i in range(rnd.randint(0, 9))]
+    free_cores = rnd.choice([32, 64, 1024])
+
+    exact = exact_pairs(jobs, index, free_cores)
+    greedy = greedy_pairs(jobs, index, free_cores)
+
+    # Every job is paired at most once and the pairs fit
+    paired = [job.job_id for pair in exact for job in pair]
+    assert len(paired) == len(set(paired))
+    assert sum(pair_cores(job, co_job) for job, co_job in exact) <= free_cores
+
+    assert weight(exact, index) == pytest.approx(best_weight(jobs, index, free_cores))
+    assert weight(exact, index) >= weight(greedy, index) - 1e-9
+
+
+def test_exact_limit():
+    scheduler = BalancingRanksCoscheduler()
+
+    scheduler.set_pairing("matching", MAX_EXACT_LIMIT)
+    assert scheduler.pairing == "matching"
+    assert scheduler.exact_limit == MAX_EXACT_LIMIT
+
+    for exact_limit in (-1, MAX_EXACT_LIMIT + 1):
+        with pytest.raises(RuntimeError):
+            scheduler.set_pairing("matching", exact_limit)
+
+    with pytest.raises(RuntimeError):
+        scheduler.set_pairing("optimal")
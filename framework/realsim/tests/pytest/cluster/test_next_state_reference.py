@@ -0,0 +1,64 @@
+import json
+import os
+
+import pytest
+
+from workloads import simulate
+from realsim.cluster.abstract import COMPLETION_TOLERANCE
+from realsim.cluster.exhaustive import ClusterExhaustive
+from realsim.cluster.vectorized import ClusterExhaustiveVectorized
+from realsim.scheduler.compact import CompactScheduler
+from realsim.scheduler.coschedulers.ranks.balancing import BalancingRanksCoscheduler
+
+# Makespan, number of steps and logged job events of every workload as they
+# were produced by the original next_state, which subtracted the time of every
+# step from the remaining time of every executing job. The clusters compute the
+# remaining times from the finish times instead, so the times are compared
+# with the relative tolerance of merging completions. The events of
+# "ranks-static" were recorded again after the co-schedulers stopped ordering
+# the execution units that cannot fit a waiting job; the units with equal
+# order are visited in a different order, which changes some pairs of jobs.
+REFERENCE = os.path.join(os.path.dirname(__file__), "data", "next_state_reference.json")
+
+# Workload --> scheduler, dynamic arrivals, seed
+WORKLOADS = {
+    "compact-static": (CompactScheduler, False, 2),
+    "compact-dynamic": (CompactScheduler, True, 3),
+    "ranks-static": (BalancingRanksCoscheduler, False, 4),
+    "ranks-dynamic": (BalancingRanksCoscheduler, True, 5),
+}
+
+
+@pytest.fixture(scope="module")
+def reference():
+    with open(REFERENCE) as fd:
+        return json.load(fd)
+
+
+@pytest.mark.parametrize("cluster_cls", [ClusterExhaustive, ClusterExhaustiveVectorized])
+@pytest.mark.parametrize("name", list(WORKLOADS))
+def test_same_as_original_next_state(reference, workload, simulation, name, cluster_cls):
+    scheduler_cls, dynamic, seed = WORKLOADS[name]
+    _, jobs = workload(seed, 50, dynamic)
+
+    cluster = simulation(cluster_cls, scheduler_cls(), jobs)
+    steps = simulate(cluster)
+
+    expected = reference[name]
+
+    assert cluster.makespan == pytest.approx(expected["makespan"], rel=COMPLETION_TOLERANCE)
+    # Completions that differed only by round-off are merged into one event
+    assert steps <= expected["steps"]
+
+    # The job events go through JSON like the reference
+    job_events = json.loads(json.dumps(cluster.logger.job_events))
+    assert job_events.keys() == expected["job_events"].keys()
+
+    for key, events in job_events.items():
+        expected_events = expected["job_events"][key]
+        assert events["cores"] == expected_events["cores"]
+        assert events["waiting time"] == pytest.approx(expected_events["waiting time"],
+                                                       rel=COMPLETION_TOLERANCE)
+        # Point in time the job finished
+        assert events["trace"][-1][2] == pytest.approx(expected_events["trace"][-1][2],
+                                                       rel=COMPLETION_TOLERANCE)
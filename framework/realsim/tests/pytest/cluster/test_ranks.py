@@ -0,0 +1,82 @@
+import pytest
+
+from workloads import make_loads, make_jobs
+from realsim.cluster.exhaustive import ClusterExhaustive
+from realsim.scheduler.coschedulers.ranks.balancing import BalancingRanksCoscheduler
+
+SEED = 51
+
+
+def full_ranks(scheduler):
+    """Ranks of the waiting jobs computed from the whole waiting queue
+    """
+    waiting = list(scheduler.cluster.waiting_queue)
+    ranks = {job.job_id: 0 for job in waiting}
+
+    for i, job in enumerate(waiting):
+        for co_job in waiting[i + 1:]:
+            speedup = scheduler.heatmap.speedup(job, co_job)
+            co_speedup = scheduler.heatmap.speedup(co_job, job)
+            if speedup is None or co_speedup is None:
+                continue
+            if (speedup + co_speedup) / 2 > scheduler.ranks_threshold:
+                ranks[job.job_id] += 1
+                ranks[co_job.job_id] += 1
+
+    return ranks
+
+
+@pytest.mark.parametrize("dynamic", [False, True])
+def test_incremental_ranks(workload, simulation, dynamic):
+    _, jobs = workload(SEED, 80, dynamic)
+    cluster = simulation(ClusterExhaustive, BalancingRanksCoscheduler(), jobs)
+    scheduler = cluster.scheduler
+
+    checks = list()
+
+    def check(cluster):
+        ranks = scheduler.ranks
+        checks.append({job_id: ranks[job_id] for job_id in ranks} == full_ranks(scheduler))
+
+    check(cluster)
+    assert cluster.run(callback=check)
+
+    assert len(checks) > 1
+    assert all(checks)
+
+
+def test_jobs_after_setup(simulation):
+    loads = make_loads(10, SEED)
+    names = list(loads)
+    # Only six of the loads are known when the heatmap is built
+    jobs = make_jobs({name: loads[name] for name in names[:6]}, 30, SEED + 1, dynamic=True)
+    cluster = simulation(ClusterExhaustive, BalancingRanksCoscheduler(), jobs)
+    scheduler = cluster.scheduler
+    assert len(scheduler.heatmap) == 6
+    # The logger only keeps the events of the jobs preloaded at its setup
+    cluster.logger.recording = False
+
+    assert not cluster.run(max_events=10)
+    late = make_jobs(loads, 30, SEED + 2, dynamic=True)
+    for job in late:
+        job.queued_time += cluster.makespan
+    cluster.preload_jobs(late)
+
+    checks = list()
+
+    def check(cluster):
+        heatmap = scheduler.heatmap
+        waiting = list(cluster.waiting_queue)
+        checks.append(
+            all(job.load_index == heatmap.index[job.load.full_load_name] for job in waiting)
+            and all(heatmap.speedup(job, co_job) == job.load.get_median_speedup(co_job.load.full_load_name)
+                    for job in waiting for co_job in waiting if job is not co_job)
+            and {job_id: scheduler.ranks[job_id] for job_id in scheduler.ranks} == full_ranks(scheduler)
+        )
+
+    assert cluster.run(callback=check)
+
+    assert len(scheduler.heatmap) == len({job.load.full_load_name for job in jobs + late})
+    assert len(scheduler.heatmap) > 6
+    assert len(cluster.finished_jobs) == len(jobs) + len(late)
+    assert all(checks)
@@ -0,0 +1,44 @@
+import pytest
+
+from workloads import same_simulation
+from realsim.cluster.compact import ClusterCompact
+from realsim.cluster.exhaustive import ClusterExhaustive
+from realsim.cluster.vectorized import ClusterExhaustiveVectorized
+from realsim.scheduler.compact import CompactScheduler
+from realsim.scheduler.coschedulers.ranks.balancing import BalancingRanksCoscheduler
+
+SEED = 17
+
+
+class UngatedScheduler(CompactScheduler):
+    """CompactScheduler that is called at every step
+    """
+
+    def scheduling_signature(self):
+        return None
+
+
+@pytest.mark.parametrize("cluster_cls", [ClusterExhaustive, ClusterExhaustiveVectorized, ClusterCompact])
+def test_skipped_deployments(workload, simulation, cluster_cls):
+    _, jobs = workload(SEED, 200, dynamic=True)
+
+    reference = simulation(cluster_cls, UngatedScheduler(), jobs)
+    assert reference.run()
+
+    cluster = simulation(cluster_cls, CompactScheduler(), jobs)
+    assert cluster.run()
+
+    # Jobs that do not fit arrive while the cluster is full
+    assert reference.logger.cluster_events["deploying:skipped"] == 0
+    assert cluster.logger.cluster_events["deploying:skipped"] > 0
+
+    assert same_simulation(cluster, reference)
+
+
+def test_coschedulers_are_always_called(workload, simulation):
+    _, jobs = workload(SEED, dynamic=True)
+
+    cluster = simulation(ClusterExhaustive, BalancingRanksCoscheduler(), jobs)
+    assert cluster.run()
+
+    assert cluster.logger.cluster_events["deploying:skipped"] == 0
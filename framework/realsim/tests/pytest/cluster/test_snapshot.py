@@ -0,0 +1,44 @@
+import pytest
+
+from workloads import same_simulation
+from realsim.cluster.exhaustive import ClusterExhaustive
+from realsim.cluster.snapshot import load_snapshot
+from realsim.cluster.vectorized import ClusterExhaustiveVectorized
+from realsim.scheduler.compact import CompactScheduler
+from realsim.scheduler.coschedulers.ranks.balancing import BalancingRanksCoscheduler
+
+SEED = 21
+
+
+@pytest.mark.parametrize("cluster_cls", [ClusterExhaustive, ClusterExhaustiveVectorized])
+@pytest.mark.parametrize("scheduler_cls", [CompactScheduler, BalancingRanksCoscheduler])
+def test_resume_from_snapshot(tmp_path, workload, simulation, cluster_cls, scheduler_cls):
+    loads, jobs = workload(SEED, dynamic=True)
+
+    reference = simulation(cluster_cls, scheduler_cls(), jobs)
+    assert reference.run()
+
+    path = str(tmp_path / "simulation.snap")
+
+    cluster = simulation(cluster_cls, scheduler_cls(), jobs)
+    cluster.set_snapshots(path, interval=10)
+    # Interrupted after the snapshot of event 30
+    assert not cluster.run(max_events=35)
+
+    restored = load_snapshot(path, loads)
+    assert restored.num_of_events == 30
+    assert restored.scheduler.cluster is restored
+    assert restored.logger.cluster is restored
+
+    restored.set_snapshots(None)
+    assert restored.run()
+
+    assert same_simulation(restored, reference)
+
+
+def test_snapshot_interval(simulation, workload):
+    _, jobs = workload(SEED)
+    cluster = simulation(ClusterExhaustive, CompactScheduler(), jobs)
+
+    with pytest.raises(RuntimeError):
+        cluster.set_snapshots("simulation.snap", interval=0)
@@ -0,0 +1,63 @@
+import pytest
+
+from realsim.cluster.compact import ClusterCompact
+from realsim.cluster.exhaustive import ClusterExhaustive
+from realsim.cluster.tracer import StateTracer, diff_traces, load_trace
+from realsim.cluster.vectorized import ClusterExhaustiveVectorized
+from realsim.scheduler.compact import CompactScheduler
+from realsim.scheduler.coschedulers.ranks.balancing import BalancingRanksCoscheduler
+
+# Workload --> scheduler, dynamic arrivals, seed
+WORKLOADS = {
+    "compact-static": (CompactScheduler, False, 11),
+    "compact-dynamic": (CompactScheduler, True, 12),
+    "ranks-static": (BalancingRanksCoscheduler, False, 13),
+    "ranks-dynamic": (BalancingRanksCoscheduler, True, 14),
+}
+
+
+@pytest.fixture
+def traced_run(workload, simulation):
+    """Run a workload on a cluster with a tracer; return the cluster and the
+    entries of its trace
+    """
+    def run(cluster_cls, name, path=None):
+        scheduler_cls, dynamic, seed = WORKLOADS[name]
+        _, jobs = workload(seed, dynamic=dynamic)
+        cluster = simulation(cluster_cls, scheduler_cls(), jobs)
+
+        tracer = StateTracer(path)
+        cluster.set_tracer(tracer)
+        assert cluster.run()
+        tracer.close()
+
+        return cluster, tracer.entries
+    return run
+
+
+@pytest.mark.parametrize("cluster_cls", [ClusterExhaustiveVectorized, ClusterCompact])
+@pytest.mark.parametrize("name", list(WORKLOADS))
+def test_same_states_as_exhaustive(traced_run, name, cluster_cls):
+    reference, reference_trace = traced_run(ClusterExhaustive, name)
+    cluster, trace = traced_run(cluster_cls, name)
+
+    assert len(reference_trace) == reference.num_of_events
+    assert diff_traces(reference_trace, trace) is None
+    assert cluster.makespan == reference.makespan
+    assert cluster.finished_jobs == reference.finished_jobs
+
+
+def test_diverging_traces(traced_run, tmp_path):
+    path = str(tmp_path / "compact.trace")
+    _, trace = traced_run(ClusterExhaustive, "compact-static", path)
+    _, other = traced_run(ClusterExhaustive, "ranks-static")
+
+    # The trace written to the file is the recorded one
+    assert load_trace(path) == trace
+
+    ref, cand = diff_traces(trace, other)
+    assert ref.rolling != cand.rolling
+    assert ref.event == cand.event
+
+    # A prefix of a trace diverges where it ends
+    assert diff_traces(trace, trace[:-1]) == (trace[-1], None)
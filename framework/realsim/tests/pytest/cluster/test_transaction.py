@@ -0,0 +1,138 @@
+import pytest
+
+from realsim.cluster.exhaustive import ClusterExhaustive
+from realsim.jobs import ExecutionUnit
+from realsim.scheduler.coschedulers.ranks.balancing import BalancingRanksCoscheduler
+
+SEED = 31
+
+
+@pytest.fixture
+def cluster(workload, simulation):
+    _, jobs = workload(SEED)
+    cluster = simulation(ClusterExhaustive, BalancingRanksCoscheduler(), jobs)
+    assert not cluster.run(max_events=3)
+    cluster.load_in_waiting_queue()
+    assert len(cluster.waiting_queue) > 4
+    return cluster
+
+
+def state(cluster):
+    """The parts of the cluster a transaction changes
+    """
+    ranks = cluster.scheduler.ranks
+    return (
+        [job.job_id for job in cluster.waiting_queue],
+        [(job.binded_cores, job.speedup, job.remaining_time) for job in cluster.waiting_queue],
+        cluster.free_cores,
+        cluster.node_map.free.tolist(),
+        [(unit.head.job_id, [job.job_id for job in unit.cojobs], unit.free_cores)
+         for unit in cluster.execution_list],
+        {job_id: ranks[job_id] for job_id in ranks},
+    )
+
+
+def fitting_jobs(cluster, num_of_jobs):
+    """Return waiting jobs, not only from the head of the queue, that fit
+    together on full nodes
+    """
+    jobs = list()
+    cores = cluster.free_cores
+    for job in reversed(list(cluster.waiting_queue)):
+        if job.full_node_cores <= cores:
+            jobs.append(job)
+            cores -= job.full_node_cores
+        if len(jobs) == num_of_jobs:
+            break
+    return jobs
+
+
+def deploy_compact(tx, job):
+    tx.take(job)
+    tx.save(job)
+    job.binded_cores = job.full_node_cores
+    tx.deploy(ExecutionUnit(job, compact=True))
+
+
+def test_rollback(cluster):
+    before = state(cluster)
+    waiting = len(cluster.waiting_queue)
+
+    jobs = fitting_jobs(cluster, 2)
+    assert jobs != []
+
+    tx = cluster.transaction()
+    for job in jobs:
+        deploy_compact(tx, job)
+
+    # The tentative deployments are visible in the cluster
+    assert len(cluster.waiting_queue) == waiting - len(jobs)
+    assert cluster.free_cores == before[2] - sum(job.full_node_cores for job in jobs)
+    assert cluster.node_map.free.tolist() != before[3]
+
+    tx.rollback()
+
+    # The jobs are back in their places of the queue
+    assert state(cluster) == before
+
+    # A closed transaction cannot be used again
+    with pytest.raises(RuntimeError):
+        tx.take(cluster.waiting_queue[0])
+
+
+def test_rollback_co_jobs(cluster):
+    before = state(cluster)
+
+    # The two smallest jobs, which are not at the head of the queue
+    waiting = sorted(cluster.waiting_queue, key=lambda job: job.half_node_cores)
+    job, co_job = waiting[0], waiting[1]
+    assert cluster.waiting_queue[0] not in (job, co_job)
+
+    tx = cluster.transaction()
+    tx.take(job)
+    tx.save(job)
+    job.binded_cores = job.half_node_cores
+    tx.take(co_job)
+    tx.save(co_job)
+    co_job.binded_cores = co_job.half_node_cores
+    co_job.ratioed_remaining_time(job)
+
+    unit = ExecutionUnit(job)
+    tx.add(unit, co_job)
+    tx.deploy(unit)
+    assert unit in cluster.execution_list
+
+    tx.rollback()
+
+    assert state(cluster) == before
+
+
+def test_rollback_on_error(cluster):
+    before = state(cluster)
+
+    job = cluster.waiting_queue[0]
+
+    # The unit does not fit in the cluster, so the deployment raises and the
+    # transaction is rolled back on exit
+    with pytest.raises(RuntimeError):
+        with cluster.transaction() as tx:
+            tx.take(job)
+            tx.save(job)
+            job.binded_cores = cluster.total_cores + cluster.cores_per_node
+            tx.deploy(ExecutionUnit(job, compact=True))
+
+    assert state(cluster) == before
+
+
+def test_commit(cluster):
+    free_cores = cluster.free_cores
+    job = fitting_jobs(cluster, 1)[0]
+
+    with cluster.transaction() as tx:
+        deploy_compact(tx, job)
+        tx.commit()
+
+    assert job not in cluster.waiting_queue
+    assert job.job_id not in cluster.scheduler.ranks
+    assert cluster.execution_list[-1].head is job
+    assert cluster.free_cores == free_cores - job.full_node_cores
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from realsim.cluster.exhaustive import ClusterExhaustive
+from realsim.cluster.vectorized import ClusterExhaustiveVectorized
+from realsim.jobs.table import EXECUTING
+from realsim.scheduler.compact import CompactScheduler
+from realsim.scheduler.coschedulers.ranks.balancing import BalancingRanksCoscheduler
+
+SEED = 3
+
+
+@pytest.mark.parametrize("scheduler_cls", [CompactScheduler, BalancingRanksCoscheduler])
+def test_running_index(workload, simulation, scheduler_cls):
+    _, jobs = workload(SEED, dynamic=True)
+    cluster = simulation(ClusterExhaustiveVectorized, scheduler_cls(), jobs)
+    table = cluster.table
+
+    while not cluster.run(max_events=10):
+        # The index holds exactly the rows of the executing jobs
+        running = table.running[:table.num_running]
+        assert sorted(table.job_id[running].tolist()) == sorted(cluster.xunit_of)
+        assert (table.state[running] == EXECUTING).all()
+        assert (table.position[running] == range(table.num_running)).all()
+
+    assert table.num_running == 0
+
+
+def best_time(run, repeats: int = 3) -> float:
+    """Return the shortest wall-clock time of `repeats` calls of `run`
+    """
+    times = list()
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+@pytest.mark.parametrize("scheduler_cls, num_of_jobs", [(CompactScheduler, 800),
+                                                        (BalancingRanksCoscheduler, 500)])
+def test_faster_than_heap_engine(workload, simulation, scheduler_cls, num_of_jobs):
+    _, jobs = workload(SEED, num_of_jobs, dynamic=True)
+
+    makespans = dict()
+
+    def run(cluster_cls):
+        cluster = simulation(cluster_cls, scheduler_cls(), jobs)
+        cluster.logger.recording = False
+        assert cluster.run()
+        makespans[cluster_cls] = cluster.makespan
+
+    heap = best_time(lambda: run(ClusterExhaustive))
+    vectorized = best_time(lambda: run(ClusterExhaustiveVectorized))
+
+    assert makespans[ClusterExhaustiveVectorized] == makespans[ClusterExhaustive]
+    assert vectorized < heap
@@ -0,0 +1,78 @@
+import pytest
+
+from realsim.cluster.compact import ClusterCompact
+from realsim.cluster.exhaustive import ClusterExhaustive
+from realsim.cluster.watchdog import BudgetExceeded, SimulationStalled
+from realsim.scheduler.compact import CompactScheduler
+
+SEED = 41
+
+
+class IdleScheduler(CompactScheduler):
+    """Claims to deploy jobs without deploying any, and asks for the
+    scheduling to be repeated; the cluster never advances in time
+    """
+
+    def __init__(self):
+        CompactScheduler.__init__(self)
+        self.backfill_enabled = True
+
+    def deploy(self) -> bool:
+        return True
+
+    def backfill(self) -> bool:
+        return True
+
+
+@pytest.fixture
+def jobs(workload):
+    return workload(SEED, 40)[1]
+
+
+def test_stalled(simulation, jobs):
+    cluster = simulation(ClusterExhaustive, IdleScheduler(), jobs)
+    cluster.set_budgets(stall_steps=20)
+
+    with pytest.raises(SimulationStalled) as error:
+        cluster.run()
+
+    assert cluster.makespan == 0
+    # The repeated state is seen once and then repeated `stall_steps` times
+    assert cluster.num_of_events == 0
+    assert "No progress for 20 steps" in str(error.value)
+
+
+@pytest.mark.parametrize("cluster_cls", [ClusterExhaustive, ClusterCompact])
+def test_events_budget(simulation, jobs, cluster_cls):
+    cluster = simulation(cluster_cls, CompactScheduler(), jobs)
+    cluster.set_budgets(max_events=5)
+
+    with pytest.raises(BudgetExceeded):
+        cluster.run()
+
+    assert cluster.num_of_events == 6
+
+
+def test_wall_time_budget(simulation, jobs):
+    cluster = simulation(ClusterExhaustive, CompactScheduler(), jobs)
+    cluster.set_budgets(wall_time=0)
+
+    with pytest.raises(BudgetExceeded) as error:
+        cluster.run()
+
+    assert "wall-clock" in str(error.value)
+
+
+def test_within_budgets(simulation, jobs):
+    cluster = simulation(ClusterExhaustive, CompactScheduler(), jobs)
+    cluster.set_budgets(wall_time=600, max_events=10**6, stall_steps=5)
+
+    assert cluster.run()
+    assert len(cluster.finished_jobs) == len(jobs)
+
+
+def test_invalid_stall_steps(simulation, jobs):
+    cluster = simulation(ClusterExhaustive, CompactScheduler(), jobs)
+
+    with pytest.raises(RuntimeError):
+        cluster.set_budgets(stall_steps=0)
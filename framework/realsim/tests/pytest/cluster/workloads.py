@@ -0,0 +1,121 @@
+"""
+Synthetic workloads for the cluster tests. The loads are built in memory with
+random compact times and co-scheduling speedups, so the tests need no
+database of measurements.
+"""
+
+import json
+import os
+import random
+import sys
+
+# API
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../../../../../"
+)))
+
+# REALSIM
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../../../../"
+)))
+
+from api.loader import Load
+from realsim.jobs import Job
+from realsim.logger.logger import Logger
+
+
+def make_loads(num_of_loads: int, seed: int) -> dict[str, Load]:
+    """Return loads with random compact times and a random speedup for every
+    pair of loads
+    """
+    rnd = random.Random(seed)
+
+    loads: dict[str, Load] = dict()
+    for i in range(num_of_loads):
+        name = f"b{i}.D.{rnd.choice([16, 32, 64, 100, 128, 256, 512])}"
+        load = Load(name, "NAS")
+        load.compact_time_bundle = [rnd.uniform(50, 500) for _ in range(3)]
+        loads[name] = load
+
+    names = list(loads)
+    for i, name in enumerate(names):
+        for co_name in names[i:]:
+            for load, co_load in ((name, co_name), (co_name, name)):
+                loads[load].coloads[co_load] = [[1.0]]
+                loads[load].coloads_median_speedup[co_load] = rnd.uniform(0.6, 1.5)
+
+    return loads
+
+
+def make_jobs(loads: dict[str, Load],
+              num_of_jobs: int,
+              seed: int,
+              dynamic: bool = False) -> list[Job]:
+    """Return jobs of random loads; all of them queued at the start or, if
+    `dynamic`, arriving with exponential inter-arrival times
+    """
+    rnd = random.Random(seed)
+    names = list(loads)
+
+    jobs: list[Job] = list()
+    queued_time = 0.0
+    for i in range(num_of_jobs):
+        load = loads[rnd.choice(names)]
+        job = Job(load=load,
+                  job_id=i,
+                  job_name=load.full_load_name,
+                  num_of_processes=load.num_of_processes,
+                  binded_cores=load.num_of_processes,
+                  half_node_cores=-1,
+                  full_node_cores=-1,
+                  remaining_time=load.get_avg(),
+                  queued_time=0,
+                  waiting_time=0,
+                  wall_time=600)
+        if dynamic:
+            job.queued_time = queued_time
+            queued_time += rnd.expovariate(1 / 20.0)
+        jobs.append(job)
+
+    return jobs
+
+
+def prepare(cluster, scheduler, jobs: list[Job]):
+    """Preload the jobs to the cluster and set up the cluster, its scheduler
+    and a logger; return the cluster
+    """
+    logger = Logger()
+
+    cluster.preload_jobs(jobs)
+
+    cluster.assign_scheduler(scheduler)
+    scheduler.assign_cluster(cluster)
+
+    cluster.assign_logger(logger)
+    scheduler.assign_logger(logger)
+
+    cluster.setup()
+    scheduler.setup()
+    logger.setup()
+
+    return cluster
+
+
+def simulate(cluster) -> int:
+    """Step a prepared cluster until every job finished; return the number of
+    steps
+    """
+    steps = 0
+    while cluster.has_preloaded() or cluster.waiting_queue != [] or cluster.execution_list != []:
+        cluster.step()
+        steps += 1
+    return steps
+
+
+def same_simulation(cluster, reference) -> bool:
+    """True if two finished simulations have the same makespan, finished the
+    jobs in the same order and logged the same job events
+    """
+    return (cluster.makespan == reference.makespan
+            and cluster.finished_jobs == reference.finished_jobs
+            and json.dumps(cluster.logger.job_events) == json.dumps(reference.logger.job_events))